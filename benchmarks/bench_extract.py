@@ -0,0 +1,91 @@
+"""
+bench_extract.py — HTML link-extraction micro-benchmark
+
+Builds a synthetic 5000-post arhivach-style thread page and times every
+installed backend of mediachdl_sites.extract_hrefs against the original
+html.parser + double find_all walk.
+
+    python benchmarks/bench_extract.py [posts] [repeats]
+"""
+
+import os
+import sys
+import time
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from mediachdl_core import VIDEO_EXTS, IMAGE_EXTS
+from mediachdl_sites import HTML_BACKENDS, SiteAdapter
+
+PAGE_URL = "https://arhivach.vc/thread/1000000/"
+
+
+def make_page(posts: int) -> str:
+    exts  = IMAGE_EXTS + VIDEO_EXTS
+    parts = ["<html><head><title>thread</title></head><body><div class='thread'>"]
+    for i in range(posts):
+        ext = exts[i % len(exts)]
+        parts.append(
+            f"<div class='post' id='p{i}'>"
+            f"<div class='post_head'><a href='#p{i}'>#{i}</a> <a href='/user/{i}'>anon</a></div>"
+            f"<div class='file'><a href='/storage/{i}/{1700000000 + i}.{ext}'>"
+            f"<img src='/thumb/{i}.jpg'></a></div>"
+            f"<div class='post_comment'>Lorem ipsum dolor sit amet &gt;&gt;{i - 1} "
+            f"<a href='https://example.com/{i}'>link</a> consectetur adipiscing elit.</div>"
+            f"</div>"
+        )
+    parts.append("</div></body></html>")
+    return "".join(parts)
+
+
+def baseline(url: str, html: str):
+    """The pre-adapter extraction: html.parser, two walks, per-ext f-strings."""
+    media_types = IMAGE_EXTS + VIDEO_EXTS
+    soup  = BeautifulSoup(html, "html.parser")
+    links = set()
+    for tag in soup.find_all("a", href=True):
+        href = tag["href"]
+        if any(href.endswith(f".{ext}") for ext in media_types):
+            links.add(urljoin(url, href))
+    for file_elem in soup.find_all(class_="file"):
+        for a_tag in file_elem.find_all("a", href=True):
+            href = a_tag["href"]
+            if any(href.endswith(f".{ext}") for ext in media_types):
+                links.add(urljoin(url, href))
+    return links
+
+
+def timeit(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    posts   = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    html    = make_page(posts)
+    print(f"{posts} posts, {len(html) / 1024:.0f} KB, best of {repeats}")
+
+    expected = baseline(PAGE_URL, html)
+    base_t   = timeit(lambda: baseline(PAGE_URL, html), repeats)
+    print(f"  {'baseline':<12} {base_t * 1000:8.1f} ms")
+
+    adapter = SiteAdapter()
+    import mediachdl_sites
+    for name in HTML_BACKENDS:
+        mediachdl_sites.HTML_BACKEND = name
+        got = {r.url for r in adapter.parse(PAGE_URL, html)}
+        assert got == expected, f"{name}: {len(got)} links, expected {len(expected)}"
+        elapsed = timeit(lambda: adapter.parse(PAGE_URL, html), repeats)
+        print(f"  {name:<12} {elapsed * 1000:8.1f} ms  ({base_t / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+bench_importtime.py — cold import-time budget for the entry-point modules
+
+Imports each module in a fresh interpreter under `python -X importtime`,
+keeps the best of N runs, and fails (exit 1) when a module exceeds its
+budget or pulls in a dependency that must stay lazy.
+
+    python benchmarks/bench_importtime.py [repeats] [--top N]
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module -> (budget in ms, modules it must not import)
+# Budgets leave headroom over a typical desktop; the forbidden lists are
+# what actually guards against a heavy import creeping back in.
+NETWORK_STACK = ("requests", "urllib3", "bs4", "lxml", "selectolax", "aiohttp")
+BUDGETS = {
+    "mediachdl_core":   (40.0,  NETWORK_STACK),
+    "mediachdl":        (60.0,  NETWORK_STACK + ("customtkinter", "tkinter")),
+    "mediachdl_daemon": (80.0,  NETWORK_STACK + ("customtkinter", "tkinter")),
+    "mediachdl_gui":    (400.0, NETWORK_STACK),
+}
+
+
+def _installed(module: str) -> bool:
+    import importlib.util
+    return importlib.util.find_spec(module) is not None
+
+
+def measure(module: str):
+    """One cold import. Returns (total_us, {imported module: cumulative_us})."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if name == "site":
+            times.clear()   # interpreter startup, not ours
+            continue
+        times[name] = int(cumulative_us)
+    return times.get(module, 0), times
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("repeats", nargs="?", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="slowest imports to list per module")
+    args = parser.parse_args()
+
+    failed = False
+    for module, (budget_ms, forbidden) in BUDGETS.items():
+        if module == "mediachdl_gui" and not _installed("customtkinter"):
+            print(f"{module:18} skipped (customtkinter not installed)")
+            continue
+
+        runs = [measure(module) for _ in range(args.repeats)]
+        total_us, times = min(runs, key=lambda run: run[0])
+        leaked = sorted(name for name in times
+                        if name.split(".")[0] in forbidden and "." not in name)
+        ok = total_us / 1000 <= budget_ms and not leaked
+        failed |= not ok
+
+        print(f"{module:18} {total_us / 1000:7.1f} ms  (budget {budget_ms:.0f} ms)"
+              f"  {'ok' if ok else 'OVER BUDGET' if not leaked else 'LEAKED IMPORTS'}")
+        if leaked:
+            print(f"  imports {', '.join(leaked)} eagerly")
+        slowest = sorted(((us, name) for name, us in times.items()
+                          if name != module and "." not in name), reverse=True)
+        for us, name in slowest[:args.top]:
+            print(f"    {us / 1000:7.1f} ms  {name}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -25,8 +25,9 @@ LANG = {
     'label_download_folder':    'Download folder',
     'btn_browse':               '…',
     'label_skip_existing':      'Skip existing files',
-    'label_threads':            'Threads (recommended ≤ 3):',
+    'label_threads':            'Threads (max, adapted per host):',
     'label_sequential':         'Sequential download (post order)',
+    'label_watch':              'Watch thread for new posts',
 
     # Media type radio buttons
     'type_all_media':           'All media',
@@ -52,6 +53,7 @@ LANG = {
 
     # Log section
     'log_section':              'LOG',
+    'label_errors_only':        'Errors only',
 
     # Stats cards
     'stats_section':            'STATISTICS',
@@ -59,6 +61,9 @@ LANG = {
     'card_downloaded':          'Downloaded',
     'card_errors':              'Errors',
     'card_skipped':             'Skipped',
+    'card_speed':               'Speed',
+    'card_eta':                 'ETA',
+    'card_latency':             'Latency (TTFB)',
 
     # Status bar
     'status_ready':             'Ready',
@@ -67,6 +72,7 @@ LANG = {
     'status_downloading':       'Downloading {done} of {total} files',
     'status_stopped':           'Download stopped by user',
     'status_done':              'Download complete!',
+    'status_watching':          'Watching thread, next check in {seconds} s',
     'status_stopping':          'Stopping download…',
 
     # Messageboxes
@@ -91,21 +97,35 @@ LANG = {
     'log_found_files':          'Files found ({subfolder}): {count}',
     'log_no_ext_files':         'No files with the specified extension found.',
     'log_fetching_links':       'Fetching links for {types}…',
+    'log_page_not_modified':    'Page not modified since last fetch, reusing cached links.',
+    'log_api_fallback':         'Thread API unavailable, falling back to the HTML page.',
     'log_page_error':           'Error fetching page: HTTP {code}',
     'log_link_error':           'Error fetching links: {error}',
     'log_download_error':       'Error downloading {link}: {error}',
+    'log_retry':                'Retrying {filename} in {seconds}s ({reason}, attempt {attempt}/{retries})',
     'log_general_error':        'Download error: {error}',
     'log_stop_requested':       'Stop requested…',
     'log_stopped':              'Download stopped by user.',
     'log_done':                 'Download complete!',
     'log_checking_url':         'Checking URL: {url}',
     'log_check_error':          'Error checking URL: {error}',
+    'log_async_engine':         'Asyncio engine: up to {limit} transfers in flight.',
+    'log_async_unavailable':    'Asyncio engine needs aiohttp (pip install aiohttp); using threads.',
+    'log_watch_start':          'Watching thread, polling every {min}–{max} s…',
+    'log_watch_new':            'New media in thread: {count}',
+    'log_watch_gone':           'Thread is gone (HTTP 404), watch finished.',
+    'log_watch_closed':         'Thread is closed or archived, watch finished.',
+    'log_batch_start':          'Batch: {total} files from {threads} thread(s) in one queue.',
+    'log_host_limits':          'Limits for {host}: {concurrency} parallel, {rate} req/s',
     'log_sequential':           'Sequential mode: links sorted by post order.',
+    'log_order':                'Queue order: {order} ({probed} size(s) probed).',
 
     'file_skipped':             'Skipped (exists): {filename}',
     'file_saved':               'Saved: {filename}',
+    'file_linked':              'Linked (already downloaded): {filename}',
     'file_cancelled':           'Cancelled: {filename}',
-    'file_failed':              'Failed after {retries} retries: {filename}',
+    'file_failed':              'Failed after {attempts} attempt(s) ({reason}): {filename}',
+    'thread_unreadable':        'Could not read thread: {url}',
 
     # Save log dialog
     'save_log_filename':        'download_log_{timestamp}.txt',
@@ -0,0 +1,255 @@
+"""
+mediachdl.py — headless command line interface for Media Downloader
+Usage: python -m mediachdl {check,download} URL [options]
+       python -m mediachdl daemon [-o FOLDER] [--port N]
+
+Every log line, progress update, status change and per-file result is
+written to stdout as one JSON object per line, e.g.
+    {"event": "file", "url": "...", "filename": "1.webm", "ok": true, "message": "Saved: 1.webm"}
+Never imports the GUI, so it runs without a display.
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+
+from mediachdl_core import (MediaDownloaderCore, ENGINE_ASYNCIO, ENGINE_THREADS,
+                            MEDIA_TYPE_NAMES, WATCH_MIN_INTERVAL, is_valid_url,
+                            read_url_list)
+from mediachdl_order import ORDER_NAMES, ORDER_POST
+from mediachdl_retry import RetryPolicy
+from mediachdl_writer import FSYNC_NAMES, FSYNC_NEVER
+
+# Exit codes
+EXIT_OK       = 0
+EXIT_FAILED   = 1     # some file failed, or the thread could not be read
+EXIT_STOPPED  = 130   # interrupted by SIGINT / SIGTERM
+
+
+class JsonLinesEmitter:
+    """Writes events as JSON lines; safe to call from worker threads."""
+
+    def __init__(self, stream=None):
+        self.stream  = stream or sys.stdout
+        self._lock   = threading.Lock()
+        self.ok      = 0
+        self.failed  = 0
+
+    def emit(self, event: str, **fields):
+        line = json.dumps({"event": event, "ts": round(time.time(), 3), **fields},
+                          ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    # ── Core callbacks ────────────────────────────────────────────────────────
+
+    def log(self, message: str):
+        self.emit("log", message=message)
+
+    def progress(self, done: int, total: int):
+        self.emit("progress", done=done, total=total)
+
+    def status(self, message: str):
+        self.emit("status", message=message)
+
+    def file(self, url: str, filename, ok: bool, message: str):
+        with self._lock:
+            if ok:
+                self.ok += 1
+            else:
+                self.failed += 1
+        self.emit("file", url=url, filename=filename, ok=ok, message=message)
+
+
+def _host_limits(values):
+    limits = {}
+    for value in values or []:
+        host, sep, limit = value.partition("=")
+        if not sep or not limit.isdigit():
+            raise argparse.ArgumentTypeError(f"expected HOST=N, got {value!r}")
+        limits[host] = int(limit)
+    return limits
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m mediachdl",
+        description="Download media from 2ch / arhivach / 4chan threads; "
+                    "events are printed as JSON lines.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    check = commands.add_parser("check", help="count media in a thread without downloading")
+    check.add_argument("url")
+
+    dl = commands.add_parser("download", help="download one or more threads")
+    dl.add_argument("urls", nargs="*", metavar="URL")
+    dl.add_argument("-i", "--url-file", help="text file with one thread URL per line")
+    dl.add_argument("-o", "--output", default=os.path.join(os.getcwd(), "Downloads"),
+                    help="base folder (default: ./Downloads)")
+    dl.add_argument("-t", "--type", dest="media_type", choices=MEDIA_TYPE_NAMES,
+                    default="all_media")
+    dl.add_argument("-j", "--threads", dest="max_workers", type=int, default=3)
+    dl.add_argument("--skip-existing", action="store_true")
+    dl.add_argument("--sequential", action="store_true",
+                    help="one file at a time, in post order")
+    dl.add_argument("--engine", choices=[ENGINE_THREADS, ENGINE_ASYNCIO], default=ENGINE_THREADS)
+    dl.add_argument("--async-limit", type=int, default=32)
+    dl.add_argument("--order", choices=ORDER_NAMES, default=ORDER_POST,
+                    help="queue order; largest starts big videos first and shortens "
+                         "mixed jobs (sizes the site omits are probed with HEAD)")
+    dl.add_argument("--dedupe", action="store_true",
+                    help="link files already downloaded under the base folder")
+    dl.add_argument("--watch", action="store_true",
+                    help="keep polling the thread for new media until it ends")
+    dl.add_argument("--interval", type=float,
+                    help=f"fixed watch poll period in seconds, at least {WATCH_MIN_INTERVAL} "
+                         "(default: adaptive)")
+    dl.add_argument("--host-limit", action="append", metavar="HOST=N",
+                    help="batch mode: max transfers per host (repeatable)")
+    dl.add_argument("--retries", type=int, default=3, help="attempts per file")
+    dl.add_argument("--chunk-size", type=int, help="fixed read size in bytes")
+    dl.add_argument("--fsync", choices=FSYNC_NAMES, default=FSYNC_NEVER,
+                    help="file: flush each finished file to disk before naming it")
+    dl.add_argument("--metrics", metavar="FILE",
+                    help="write transfer metrics on exit: JSON if FILE ends in .json, "
+                         "else Prometheus text")
+
+    daemon = commands.add_parser("daemon", help="serve a local HTTP job API (see mediachdl_daemon)")
+    daemon.add_argument("-o", "--output", default=os.path.join(os.getcwd(), "Downloads"),
+                        help="default base folder for jobs (default: ./Downloads)")
+    daemon.add_argument("--host", default="127.0.0.1")
+    daemon.add_argument("--port", type=int, default=8765)
+    daemon.add_argument("--retries", type=int, default=3, help="attempts per file")
+    daemon.add_argument("--chunk-size", type=int, help="fixed read size in bytes")
+    daemon.add_argument("--fsync", choices=FSYNC_NAMES, default=FSYNC_NEVER)
+    return parser
+
+
+def _run_until_done(core: MediaDownloaderCore, target, **kwargs) -> bool:
+    """
+    Run target in a worker thread so SIGINT/SIGTERM can request a clean
+    stop (partial files stay resumable). Returns True if stopped.
+    """
+    worker = threading.Thread(target=target, kwargs=kwargs, daemon=True)
+
+    def _stop(signum, frame):
+        core.request_stop()
+
+    signal.signal(signal.SIGINT, _stop)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, _stop)
+    worker.start()
+    while worker.is_alive():
+        worker.join(0.2)
+    return core.stop_requested
+
+
+def _check(args, out: JsonLinesEmitter) -> int:
+    core   = MediaDownloaderCore()
+    result = {}
+
+    def _done(images, videos):
+        result.update(images=images, videos=videos)
+        out.emit("check", url=args.url, images=images, videos=videos)
+
+    def _error(message):
+        out.emit("error", message=message)
+
+    core.check_url(args.url, log_cb=out.log, done_cb=_done, error_cb=_error)
+    core.close()
+    return EXIT_OK if result else EXIT_FAILED
+
+
+def _download(args, out: JsonLinesEmitter, parser) -> int:
+    urls = list(args.urls)
+    if args.url_file:
+        urls += read_url_list(args.url_file)
+    invalid = [url for url in urls if not is_valid_url(url)]
+    if not urls or invalid:
+        parser.error(f"invalid URL: {invalid[0]}" if invalid else "no URL given")
+    if args.watch and len(urls) > 1:
+        parser.error("--watch takes a single URL")
+    try:
+        host_limits = _host_limits(args.host_limit)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    os.makedirs(args.output, exist_ok=True)
+    core   = MediaDownloaderCore(chunk_size=args.chunk_size,
+                                 retry=RetryPolicy(max_retries=max(1, args.retries)),
+                                 fsync=args.fsync)
+    common = dict(
+        base_folder   = args.output,
+        media_type    = args.media_type,
+        skip_existing = args.skip_existing,
+        max_workers   = max(1, args.max_workers),
+        log_cb        = out.log,
+        progress_cb   = out.progress,
+        status_cb     = out.status,
+        done_cb       = lambda: None,
+        dedupe        = args.dedupe,
+        file_cb       = out.file,
+        order         = args.order,
+    )
+    if len(urls) > 1:
+        stopped = _run_until_done(core, core.download_batch, urls=urls,
+                                  host_limits=host_limits, **common)
+    else:
+        run   = core.watch if args.watch else core.download
+        extra = {"interval": args.interval} if args.watch else {}
+        stopped = _run_until_done(core, run, url=urls[0], sequential=args.sequential,
+                                  engine=args.engine, async_limit=args.async_limit,
+                                  **common, **extra)
+    core.close()
+
+    out.emit("metrics", **core.metrics.snapshot())
+    if args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            f.write(core.metrics.to_json() if args.metrics.endswith(".json")
+                    else core.metrics.to_prometheus())
+    out.emit("done", stopped=stopped, ok=out.ok, failed=out.failed)
+    if stopped:
+        return EXIT_STOPPED
+    return EXIT_FAILED if out.failed else EXIT_OK
+
+
+def _daemon(args, out: JsonLinesEmitter) -> int:
+    from mediachdl_daemon import serve
+
+    core = MediaDownloaderCore(chunk_size=args.chunk_size,
+                               retry=RetryPolicy(max_retries=max(1, args.retries)),
+                               fsync=args.fsync)
+    try:
+        serve(args.output, args.host, args.port, core,
+              ready_cb=lambda addr: out.emit("listening", host=addr[0], port=addr[1]))
+    except KeyboardInterrupt:
+        pass
+    out.emit("done", stopped=True)
+    return EXIT_OK
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args   = parser.parse_args(argv)
+    out    = JsonLinesEmitter()
+    if args.command == "check":
+        if not is_valid_url(args.url):
+            parser.error(f"invalid URL: {args.url}")
+        return _check(args, out)
+    if args.command == "daemon":
+        return _daemon(args, out)
+    return _download(args, out, parser)
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        # reader went away (e.g. piped into head); don't trace back on exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(EXIT_FAILED)
@@ -0,0 +1,208 @@
+"""
+mediachdl_async.py — asyncio download engine for Media Downloader
+Requires: pip install aiohttp
+"""
+
+import os
+import time
+import asyncio
+
+import aiohttp
+
+from language_en import LANG
+from mediachdl_core import (PART_SUFFIX, _body_length, _chunk_size, _failure_for,
+                            _hash_file, _part_complete, _part_offset, _recover_alloc,
+                            _resume_mode)
+from mediachdl_ratelimit import THROTTLE_STATUSES, parse_retry_after
+from mediachdl_retry import Failure, FAIL_ERROR, FAIL_NETWORK, FAIL_THROTTLED
+from mediachdl_scheduler import WorkItem
+
+
+def t(key: str, **kwargs) -> str:
+    s = LANG.get(key, key)
+    return s.format(**kwargs) if kwargs else s
+
+
+async def _download_one(core, http: aiohttp.ClientSession, sem: asyncio.Semaphore,
+                        item: WorkItem, skip_existing: bool, log_cb):
+    """
+    Async twin of one scheduler worker pass over item. Returns (message, success_bool).
+    Backoff waits happen outside the semaphore so other transfers keep its slots.
+    """
+    try:
+        while True:
+            async with sem:
+                result = await _try_file(core, http, item, skip_existing)
+            if not isinstance(result, Failure):
+                break
+            delay = core._retry_delay(item, result, log_cb)
+            if delay is None or not await _sleep(core, delay):
+                result = core._give_up(item, result), False
+                break
+    except Exception as e:
+        result = t('log_download_error', link=item.record.url, error=e), False
+    core._report_file(item, result[1], result[0])
+    return result
+
+
+async def _try_file(core, http: aiohttp.ClientSession, item: WorkItem, skip_existing: bool):
+    """Async twin of MediaDownloaderCore._try_file."""
+    loop = asyncio.get_running_loop()
+    # the first item of a folder loads its manifest; dedupe may copy a whole file
+    result = await loop.run_in_executor(None, core._prepare_item, item, skip_existing)
+    if result is not None:
+        return result
+
+    limiter = core._limits.for_url(item.record.url)
+    if not await _acquire(core, limiter):
+        await loop.run_in_executor(None, core._unfinished_file, item.record,
+                                   item.filename, item.file_path)
+        return t('file_cancelled', filename=item.filename), False
+    item.attempts += 1
+    try:
+        return await _attempt_download(core, http, item.record, item.filename,
+                                       item.file_path, limiter)
+    except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+            asyncio.TimeoutError) as e:
+        limiter.on_throttle()
+        return Failure(FAIL_NETWORK, type(e).__name__)
+    except Exception as e:
+        return Failure(FAIL_ERROR, str(e))
+    finally:
+        limiter.release()
+
+
+async def _sleep(core, seconds: float) -> bool:
+    """asyncio.sleep() that wakes early on stop. False if stop was requested."""
+    loop = asyncio.get_running_loop()
+    end  = loop.time() + seconds
+    while not core._is_stopped():
+        left = end - loop.time()
+        if left <= 0:
+            return True
+        await asyncio.sleep(min(left, 0.5))
+    return False
+
+
+async def _acquire(core, limiter) -> bool:
+    """Non-blocking HostLimiter.acquire(). False if stop was requested while waiting."""
+    while not core._is_stopped():
+        wait = limiter.try_acquire()
+        if not wait:
+            return True
+        await asyncio.sleep(wait)
+    return False
+
+
+async def _attempt_download(core, http: aiohttp.ClientSession, record, filename: str,
+                            file_path: str, limiter):
+    """
+    Async twin of MediaDownloaderCore._attempt_download. Disk work that can
+    take a while (hashing a resumed .part, renames, settling the file)
+    runs in the default executor so it doesn't stall the other transfers.
+    """
+    loop      = asyncio.get_running_loop()
+    part_path = file_path + PART_SUFFIX
+    offset    = await loop.run_in_executor(None, _resume_offset, file_path, part_path)
+    headers   = {"Range": f"bytes={offset}-"} if offset else {}
+    started   = time.monotonic()
+    async with http.get(record.url, headers=headers) as response:
+        core.metrics.on_response(record.url, time.monotonic() - started)
+        status = response.status
+        if status in THROTTLE_STATUSES:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            limiter.on_throttle(retry_after)
+            return Failure(FAIL_THROTTLED, f"HTTP {status}", retry_after)
+
+        content_range = response.headers.get("Content-Range")
+        if _part_complete(status, offset, content_range):
+            return await loop.run_in_executor(None, core._complete_part, record, filename,
+                                              file_path, offset, limiter)
+
+        mode = _resume_mode(status, offset, content_range)
+        if mode is None:
+            return _failure_for(status, part_path)
+        if mode == "wb" and offset:
+            os.remove(part_path)   # the server sent the whole file again
+
+        length    = _body_length(response.headers)
+        read_size = _chunk_size(length, core.chunk_size)
+        hasher    = core._hasher_for(record)
+        if hasher and mode == "ab":
+            await loop.run_in_executor(None, _hash_file, part_path, hasher)
+        out, tmp_path = core._write_target(file_path, mode)
+        written  = offset if mode == "ab" else 0
+        expected = written + length if length else None
+        try:
+            async for chunk in response.content.iter_chunked(read_size):
+                if core._is_stopped():
+                    break
+                # only waits when the disk stage is WRITE_BUFFER_BYTES behind
+                out.write(chunk)
+                written += len(chunk)
+                core.metrics.on_bytes(len(chunk))
+                if hasher:
+                    hasher.update(chunk)
+        except BaseException:
+            await loop.run_in_executor(None, core._keep_partial, out, tmp_path,
+                                       file_path, written)
+            raise
+        # flushing (and fsync) happens off the event loop
+        return await loop.run_in_executor(None, core._settle_output, record, filename,
+                                          file_path, out, tmp_path, written, expected,
+                                          hasher, limiter)
+
+
+def _resume_offset(file_path: str, part_path: str) -> int:
+    _recover_alloc(file_path)
+    return _part_offset(part_path)
+
+
+async def _download_all(core, items: list, skip_existing: bool,
+                        limit: int, log_cb, progress_cb, status_cb):
+    total     = len(items)
+    completed = 0
+    sem       = asyncio.Semaphore(max(1, limit))
+    headers   = {"User-Agent": core._get_session().headers["User-Agent"]}
+    connector = aiohttp.TCPConnector(limit=max(1, limit), ssl=False)
+    timeout   = aiohttp.ClientTimeout(sock_connect=10, sock_read=10)
+
+    progress_cb(0, total)
+    async with aiohttp.ClientSession(connector=connector, headers=headers,
+                                     timeout=timeout) as http:
+        tasks = [
+            asyncio.create_task(_download_one(core, http, sem, item, skip_existing, log_cb))
+            for item in items
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    result, ok = await next_done
+                    log_cb(result)
+                except Exception as e:
+                    log_cb(t('log_download_error', link='?', error=e))
+                completed += 1
+                progress_cb(completed, total)
+                status_cb(t('status_downloading', done=completed, total=total))
+                if core._is_stopped():
+                    break
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            # After a stop, running tasks bail out at their next chunk and
+            # leave a resumable .part; queued ones return "cancelled".
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def download_files_async(core, items: list, skip_existing: bool,
+                         limit: int, log_cb, progress_cb, status_cb):
+    """
+    Download WorkItems into their folders on a private event loop, keeping up
+    to limit transfers in flight. Reports through the same callbacks and
+    honours the same stop flag as the thread pool path. Blocks until done or
+    stopped.
+    """
+    asyncio.run(_download_all(core, items, skip_existing,
+                              limit, log_cb, progress_cb, status_cb))
@@ -4,19 +4,26 @@ mediachdl_core.py — download logic for Media Downloader
 
 import os
 import re
+import hashlib
 import time
 import random
 import threading
-import urllib3
-import warnings
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-from typing import Callable, List, Optional
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
 
 from language_en import LANG
+from mediachdl_manifest import (FolderManifest, STATUS_CORRUPT, STATUS_DONE, STATUS_FAILED,
+                                STATUS_PARTIAL)
+from mediachdl_metrics import TransferMetrics
+from mediachdl_order import ORDER_POST, needs_sizes, order_items
+from mediachdl_scheduler import HostScheduler, WorkItem, host_of
+from mediachdl_ratelimit import RateLimiter, THROTTLE_STATUSES, parse_retry_after
+from mediachdl_writer import DiskWriter, FSYNC_NEVER
+from mediachdl_retry import (Failure, RetryPolicy, FAIL_CORRUPT, FAIL_ERROR, FAIL_HTTP,
+                             FAIL_NETWORK, FAIL_RANGE, FAIL_SERVER, FAIL_THROTTLED)
 
-warnings.filterwarnings("ignore", category=urllib3.exceptions.InsecureRequestWarning)
+if TYPE_CHECKING:
+    import requests
 
 
 def t(key: str, **kwargs) -> str:
@@ -37,10 +44,96 @@ USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 11.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36",
 ]
 
+ENGINE_THREADS = "threads"
+ENGINE_ASYNCIO = "asyncio"
+
 VALID_HOSTS = ("2ch.su", "arhivach.vc", "4chan.org", "boards.4chan.org")
 
 IMAGE_EXTS = ["png", "jpg", "jpeg", "webp"]
 VIDEO_EXTS = ["mp4", "webm"]
+MEDIA_EXTS = frozenset(IMAGE_EXTS + VIDEO_EXTS)
+
+# media_type values understood by download() and friends
+MEDIA_TYPE_NAMES = ["all_media", "all_images", "all_videos"] + IMAGE_EXTS + VIDEO_EXTS
+
+PART_SUFFIX    = ".part"
+ALLOC_SUFFIX   = ".alloc"      # a preallocated segmented download in progress
+PREFIX_SUFFIX  = ".alloc.len"  # bytes at the start of the .alloc known to be written
+
+# Threads whose parsed records PageCache keeps; the least recently used go first
+PAGE_CACHE_ENTRIES = 256
+
+# Watch mode poll period bounds, seconds (4chan asks for >= 10 s per thread)
+WATCH_MIN_INTERVAL = 10
+WATCH_MAX_INTERVAL = 300
+
+# Streaming chunk bounds; the adaptive size aims for ~64 reads per file
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 1024 * 1024
+
+# Files this large are fetched over up to MAX_SEGMENTS connections when their
+# host has slots to spare; a range is split only while both halves get at
+# least SEGMENT_MIN_SIZE
+SEGMENT_THRESHOLD = 16 * 1024 * 1024
+SEGMENT_MIN_SIZE  = 4 * 1024 * 1024
+MAX_SEGMENTS      = 4
+# A segmented download records its written prefix every this many bytes,
+# so a crash or kill loses at most this much of it
+PREFIX_NOTE_BYTES = 4 * 1024 * 1024
+
+# Size probing for the size-based queue orders stops after this many seconds;
+# files not probed by then keep an unknown size and queue in post order
+PROBE_BUDGET = 5.0
+
+# ── Network stack, imported on first use ──────────────────────────────────────
+# requests + urllib3 take longer to import than everything else here together,
+# and nothing needs them before the first fetch.
+_requests        = None
+_accept_encoding = None   # gzip/deflate always, br (and zstd) only when urllib3 can decode them
+_network_errors  = ()
+
+
+def _http():
+    """The requests module; imports it and silences urllib3's TLS warning on first call."""
+    global _requests, _accept_encoding, _network_errors
+    if _requests is None:
+        import warnings
+        import urllib3
+        import requests
+        warnings.filterwarnings("ignore", category=urllib3.exceptions.InsecureRequestWarning)
+        _accept_encoding = urllib3.util.make_headers(accept_encoding=True)["accept-encoding"]
+        # _iter_body reads the raw urllib3 stream, whose errors requests would otherwise wrap
+        _network_errors  = (requests.ConnectionError, requests.Timeout,
+                            requests.exceptions.ChunkedEncodingError,
+                            urllib3.exceptions.ProtocolError,
+                            urllib3.exceptions.ReadTimeoutError)
+        _requests = requests
+    return _requests
+
+
+def _iter_body(response, read_size: int):
+    """
+    Yield the body of a streamed response as it arrives, at most read_size
+    bytes at a time. iter_content() blocks until a whole read_size chunk
+    has filled, which at MAX_CHUNK_SIZE on a slow host delays both progress
+    and a stop request by seconds; urllib3's read1() returns whatever one
+    socket read delivered.
+    """
+    read1 = getattr(response.raw, "read1", None)
+    if read1 is None:
+        yield from response.iter_content(read_size)
+        return
+    while True:
+        chunk = read1(read_size, decode_content=True)
+        if not chunk:
+            return
+        yield chunk
+
+
+def warm_up():
+    """Import the network stack and site adapters ahead of the first job."""
+    _http()
+    import mediachdl_sites  # noqa: F401
 
 
 def is_valid_url(url: str) -> bool:
@@ -62,45 +155,356 @@ def get_source_name(url: str) -> str:
     return "2ch"
 
 
-def _sort_links_by_post_order(links: List[str]) -> List[str]:
+def _post_order(record) -> tuple:
     """
-    Sort links so files appear in the order they were posted.
-    Works by extracting the numeric part of the filename.
-    For 2ch/arhivach filenames are typically Unix timestamps;
+    Sort key putting MediaRecords in the order they were posted.
+    The post number from a site API wins when present. HTML-scraped records
+    have none and are ordered by the numeric part of the filename:
+    for 2ch/arhivach filenames are typically Unix timestamps;
     for 4chan they follow the pattern <board>/<timestamp><random>.ext.
     Sorting lexicographically by the numeric stem preserves post order.
     """
-    def _key(url: str) -> str:
-        name = url.split("/")[-1]
-        stem = re.sub(r"\.[^.]+$", "", name)   # strip extension
-        digits = re.sub(r"\D", "", stem)         # keep only digits
-        return digits.zfill(30)                  # zero-pad for stable sort
+    return (record.post or 0, _post_order_key(record.url))
+
+
+def _post_order_key(url: str) -> str:
+    name = url.split("/")[-1]
+    stem = re.sub(r"\.[^.]+$", "", name)   # strip extension
+    digits = re.sub(r"\D", "", stem)         # keep only digits
+    return digits.zfill(30)                  # zero-pad for stable sort
+
+
+def _manifest_order(name: str, entry: dict) -> tuple:
+    """_post_order for a manifest entry (file name plus the post it came from)."""
+    return (entry.get("post") or 0, _post_order_key(name))
+
+
+_MEDIA_EXT_RE = re.compile(r"\.(" + "|".join(sorted(MEDIA_EXTS)) + r")$")
+
+
+def _link_ext(href: str) -> Optional[str]:
+    """Return the media extension of href if it is one we download, else None."""
+    match = _MEDIA_EXT_RE.search(href)
+    return match.group(1) if match else None
+
+
+class PageCache:
+    """
+    Per-URL cache of extracted media records.
+    Entries keep the ETag / Last-Modified validators of the page they were
+    parsed from, so a revalidation that returns 304 skips both the body
+    transfer and the HTML parse. At most max_entries threads are kept, so
+    a long-lived core (the daemon's) doesn't grow without bound.
+    """
+
+    def __init__(self, max_entries: int = PAGE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def put(self, url: str, etag: Optional[str], last_modified: Optional[str],
+            records: Dict[str, list], closed: bool = False):
+        with self._lock:
+            self._entries[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "records": records,
+                "closed": closed,
+            }
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        entry = self.get(url)
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _select_records(by_ext: Dict[str, list], media_types: List[str]) -> list:
+    """Flatten the records of the requested extensions."""
+    records = []
+    for ext in media_types:
+        records.extend(by_ext.get(ext, ()))
+    return records
+
+
+def _chunk_size(content_length: Optional[int], fixed: Optional[int] = None) -> int:
+    """Streaming chunk size: fixed if given, else scaled to Content-Length."""
+    if fixed:
+        return fixed
+    if not content_length:
+        return MIN_CHUNK_SIZE
+    return max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, content_length // 64))
+
+
+def _recover_alloc(file_path: str):
+    """
+    Turn the .alloc of a segmented download that never got to clean up
+    (crash, kill) into a .part of its recorded written prefix. Without a
+    record the .alloc may hold gaps and is left to be overwritten.
+    """
+    prefix_path = file_path + PREFIX_SUFFIX
+    try:
+        with open(prefix_path, encoding="utf-8") as f:
+            prefix = int(f.read() or 0)
+    except (OSError, ValueError):
+        return
+    alloc_path = file_path + ALLOC_SUFFIX
+    if prefix and os.path.exists(alloc_path) and not os.path.exists(file_path + PART_SUFFIX):
+        _keep_prefix(alloc_path, file_path + PART_SUFFIX, prefix)
+    os.remove(prefix_path)
+
+
+def _part_offset(part_path: str) -> int:
+    """Bytes already on disk for an interrupted download, 0 if none."""
+    try:
+        return os.path.getsize(part_path)
+    except OSError:
+        return 0
+
+
+def _resume_mode(status: int, offset: int, content_range: Optional[str]) -> Optional[str]:
+    """
+    Decide how to open the .part file for a response to a (maybe) ranged GET.
+    Returns "ab" to append, "wb" to start over, or None if the body is unusable.
+    A 200 to a ranged request means the server ignored Range, so the whole
+    file is coming again.
+    """
+    if status == 200:
+        return "wb"
+    if status == 206 and offset:
+        match = re.match(r"bytes (\d+)-", content_range or "")
+        if match and int(match.group(1)) == offset:
+            return "ab"
+    return None
+
+
+def _hash_file(path: str, hasher, start: int = 0):
+    """Feed an existing file (a resumed .part) from byte start on into hasher."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        for block in iter(lambda: f.read(MAX_CHUNK_SIZE), b""):
+            hasher.update(block)
+
+
+def _part_complete(status: int, offset: int, content_range: Optional[str]) -> bool:
+    """True if a 416 reply says the .part file already holds the whole file."""
+    if status != 416 or not offset:
+        return False
+    match = re.match(r"bytes \*/(\d+)", content_range or "")
+    return bool(match) and int(match.group(1)) == offset
+
+
+def _contiguous_bytes(segments: List[list]) -> int:
+    """Length of the gap-free prefix written by a segmented download's [start, end, next] ranges."""
+    prefix = 0
+    for start, end, pos in sorted(segments):
+        if start > prefix:
+            break
+        prefix = max(prefix, min(pos, end + 1))
+        if pos <= end:
+            break
+    return prefix
+
+
+def _body_length(headers) -> int:
+    """Bytes the body will decode to per Content-Length; 0 if unknown or content-encoded."""
+    if headers.get("Content-Encoding"):
+        return 0
+    try:
+        return int(headers.get("Content-Length") or 0)
+    except ValueError:
+        return 0
+
+
+def _keep_prefix(tmp_path: str, part_path: str, size: int):
+    """
+    Leave the first size bytes of an unfinished download as a resumable
+    .part. A .part being appended to already is one; a preallocated file
+    is cut down to size and renamed, or dropped when nothing is kept.
+    """
+    if tmp_path == part_path:
+        return
+    if size:
+        os.truncate(tmp_path, size)
+        os.replace(tmp_path, part_path)
+    else:
+        os.remove(tmp_path)
+
+
+def _discard(out, tmp_path: str):
+    """Close out and delete its file, whatever state the writes were in."""
+    try:
+        out.close(sync=False)
+    except Exception:
+        pass
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+
+class _RangeRefused(Exception):
+    """A segment request was not answered with the requested byte range."""
+
+
+class _NotReady:
+    """_try_file() result: the item's host has no slot or token for wait seconds."""
+    __slots__ = ("wait",)
+
+    def __init__(self, wait: float):
+        self.wait = wait
+
+
+def _failure_for(status: int, part_path: str) -> Failure:
+    """Classify a response that can't be written to part_path."""
+    if status in (206, 416):
+        # the .part no longer lines up with the remote file (a fresh
+        # request that got a range back has no .part at all)
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        return Failure(FAIL_RANGE, f"HTTP {status}")
+    return Failure(FAIL_SERVER if status >= 500 else FAIL_HTTP, f"HTTP {status}")
+
+
+def _group_by_subfolder(by_ext: Dict[str, list], media_type: str, log_cb):
+    """
+    Split the records of media_type into (subfolder, records) pairs:
+    images/ and videos/ for the "all_*" types, the extension itself
+    otherwise. Logs how many files each group has.
+    """
+    if media_type == "all_media":
+        image_records = _select_records(by_ext, IMAGE_EXTS)
+        video_records = _select_records(by_ext, VIDEO_EXTS)
+        log_cb(t('log_found_images', count=len(image_records)))
+        log_cb(t('log_found_videos', count=len(video_records)))
+        groups = [("images", image_records), ("videos", video_records)]
+    elif media_type == "all_images":
+        records = _select_records(by_ext, IMAGE_EXTS)
+        log_cb(t('log_found_images', count=len(records)))
+        groups = [("images", records)]
+    elif media_type == "all_videos":
+        records = _select_records(by_ext, VIDEO_EXTS)
+        log_cb(t('log_found_videos', count=len(records)))
+        groups = [("videos", records)]
+    else:
+        records = _select_records(by_ext, [media_type])
+        log_cb(t('log_found_files', subfolder=media_type, count=len(records)))
+        if not records:
+            log_cb(t('log_no_ext_files'))
+        groups = [(media_type, records)]
+    return [(subfolder, records) for subfolder, records in groups if records]
+
 
-    return sorted(links, key=_key)
+def read_url_list(path: str) -> List[str]:
+    """Thread URLs from a text file: one per line, blank lines and # comments ignored."""
+    with open(path, encoding="utf-8") as f:
+        lines = (line.strip() for line in f)
+        return [line for line in lines if line and not line.startswith("#")]
 
 
 # ── Callbacks type alias ──────────────────────────────────────────────────────
 LogCb    = Callable[[str], None]
 ProgCb   = Callable[[int, int], None]   # (done, total)
 StatusCb = Callable[[str], None]
+FileCb   = Callable[[str, Optional[str], bool, str], None]   # (url, filename, ok, message)
 
 
 class MediaDownloaderCore:
-    def __init__(self):
-        self.stop_requested = False
+    def __init__(self, chunk_size: Optional[int] = None, retry: Optional[RetryPolicy] = None,
+                 fsync: str = FSYNC_NEVER, share_with: Optional["MediaDownloaderCore"] = None):
+        """
+        chunk_size fixes the streaming read size; None scales it to each file.
+        retry sets which failures are retried and how; see RetryPolicy.
+        fsync is the mediachdl_writer policy for finished files.
+        share_with is a core whose connection pool, page cache, per-host
+        limits and disk writer this one uses (fsync is then the other
+        core's); the stop flag, job state and metrics stay its own.
+        """
+        self.chunk_size  = chunk_size
+        self.retry       = retry or RetryPolicy()
+        self.writer      = share_with.writer if share_with else DiskWriter(fsync)
+        self._shared     = share_with
+        self._stop_event = threading.Event()
         self._lock = threading.Lock()
+        self._page_cache = share_with._page_cache if share_with else PageCache()
+        self._session: Optional["requests.Session"] = None
+        self._pool_size = 0
+        self._dedupe = None
+        self._manifests: Dict[str, object] = {}
+        self._job_log: Optional[LogCb] = None
+        self._job_file: Optional[FileCb] = None
+        self._limits = share_with._limits if share_with else RateLimiter(on_change=self._log_limits)
+        # hosts that refused a segment range
+        self._unsegmented: set = share_with._unsegmented if share_with else set()
+        self.metrics = TransferMetrics()
+
+    @property
+    def stop_requested(self) -> bool:
+        return self._stop_event.is_set()
 
     def request_stop(self):
-        with self._lock:
-            self.stop_requested = True
+        self._stop_event.set()
 
     def _is_stopped(self) -> bool:
-        with self._lock:
-            return self.stop_requested
+        # Event.is_set() is a plain flag read, cheap enough for every chunk
+        return self._stop_event.is_set()
 
     def reset(self):
+        self._stop_event.clear()
+
+    def _get_session(self, max_workers: int = 1) -> "requests.Session":
+        """
+        Return the shared keep-alive session, growing its connection pool so
+        every worker can hold its own connection per host.
+        """
+        if self._shared is not None:
+            return self._shared._get_session(max_workers)
+        requests = _http()
         with self._lock:
-            self.stop_requested = False
+            if self._session is None:
+                self._session = requests.Session()
+                self._session.verify = False
+                self._session.headers["User-Agent"] = random.choice(USER_AGENTS)
+            if max_workers > self._pool_size:
+                self._pool_size = max_workers
+                adapter = requests.adapters.HTTPAdapter(pool_connections=len(VALID_HOSTS),
+                                                        pool_maxsize=max_workers)
+                self._session.mount("https://", adapter)
+                self._session.mount("http://", adapter)
+            return self._session
+
+    def close(self):
+        """
+        Drop pooled connections. The session is recreated on next use.
+        A core sharing another's session leaves it to that core.
+        """
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session   = None
+            self._pool_size = 0
+
+    def _log_limits(self, limiter):
+        log_cb = self._job_log
+        if log_cb:
+            log_cb(t('log_host_limits', host=limiter.host,
+                     concurrency=limiter.concurrency, rate=f"{limiter.rate:.1f}"))
 
     # ── Public API ────────────────────────────────────────────────────────────
 
@@ -114,8 +518,12 @@ class MediaDownloaderCore:
         """Fetch link counts without downloading. Runs in calling thread."""
         try:
             log_cb(t('log_checking_url', url=url))
-            images = self.get_media_links(url, IMAGE_EXTS, log_cb)
-            videos = self.get_media_links(url, VIDEO_EXTS, log_cb)
+            by_ext, _, _ = self._poll_thread(url, log_cb)
+            if by_ext is None:
+                error_cb(t('thread_unreadable', url=url))
+                return
+            images = _select_records(by_ext, IMAGE_EXTS)
+            videos = _select_records(by_ext, VIDEO_EXTS)
             done_cb(len(images), len(videos))
         except Exception as e:
             error_cb(t('log_check_error', error=e))
@@ -132,64 +540,374 @@ class MediaDownloaderCore:
         progress_cb: ProgCb,
         status_cb: StatusCb,
         done_cb: Callable[[], None],
+        engine: str = ENGINE_THREADS,
+        async_limit: int = 32,
+        dedupe: bool = False,
+        file_cb: Optional[FileCb] = None,
+        order: str = ORDER_POST,
+    ):
+        """
+        Main download entry point. Runs in calling thread (use threading externally).
+        engine selects the transfer backend: ENGINE_THREADS uses a pool of
+        max_workers threads, ENGINE_ASYNCIO keeps up to async_limit transfers
+        in flight on one event loop (needs aiohttp).
+        dedupe links files already downloaded anywhere under base_folder
+        (same md5, or same URL) instead of fetching them again.
+        file_cb, if given, gets every file's final result as
+        (url, filename, ok, message), next to the message sent to log_cb;
+        a thread that can't be read is reported as (url, None, False, message).
+        order is a mediachdl_order policy for the queue (ignored when
+        sequential); size-based ones HEAD the files the site gives no size for.
+        """
+        self.reset()
+        try:
+            self._start_job(base_folder, max_workers, dedupe, log_cb, file_cb)
+            thread_folder = self._thread_folder(url, base_folder, log_cb)
+
+            # One fetch + parse for the whole job, whatever the media type
+            by_ext = self._job_records(url, log_cb)
+            self._download_records(by_ext, thread_folder, media_type,
+                                   skip_existing, max_workers, sequential,
+                                   log_cb, progress_cb, status_cb,
+                                   engine, async_limit, order)
+
+        except Exception as e:
+            log_cb(t('log_general_error', error=e))
+        finally:
+            self._finish_job()
+            done_cb()
+
+    def watch(
+        self,
+        url: str,
+        base_folder: str,
+        media_type: str,
+        skip_existing: bool,
+        max_workers: int,
+        sequential: bool,
+        log_cb: LogCb,
+        progress_cb: ProgCb,
+        status_cb: StatusCb,
+        done_cb: Callable[[], None],
+        engine: str = ENGINE_THREADS,
+        async_limit: int = 32,
+        dedupe: bool = False,
+        interval: Optional[float] = None,
+        file_cb: Optional[FileCb] = None,
+        order: str = ORDER_POST,
     ):
-        """Main download entry point. Runs in calling thread (use threading externally)."""
+        """
+        Follow a live thread: download what is there, then poll it with
+        conditional requests and download only media not seen before, until
+        the thread 404s, is closed/archived, or stop is requested.
+        interval fixes the poll period in seconds, never below
+        WATCH_MIN_INTERVAL; None adapts it between WATCH_MIN_INTERVAL and
+        WATCH_MAX_INTERVAL (back off while the thread is quiet, snap back
+        when new media appears).
+        """
         self.reset()
         try:
-            ua = random.choice(USER_AGENTS)
-            log_cb(t('log_start_ua', ua=ua))
-
-            thread_id  = get_thread_id(url)
-            source     = get_source_name(url)
-            log_cb(t('log_source', source=source, thread_id=thread_id))
-
-            thread_folder = os.path.join(base_folder, thread_id)
-            os.makedirs(thread_folder, exist_ok=True)
-
-            if media_type == "all_media":
-                image_links = self.get_media_links(url, IMAGE_EXTS, log_cb)
-                video_links = self.get_media_links(url, VIDEO_EXTS, log_cb)
-                log_cb(t('log_found_images', count=len(image_links)))
-                log_cb(t('log_found_videos', count=len(video_links)))
-
-                if image_links:
-                    self._download_files(image_links, thread_folder, "images",
-                                         skip_existing, max_workers, sequential,
-                                         log_cb, progress_cb, status_cb)
-                if video_links and not self._is_stopped():
-                    self._download_files(video_links, thread_folder, "videos",
-                                         skip_existing, max_workers, sequential,
-                                         log_cb, progress_cb, status_cb)
-
-            elif media_type == "all_images":
-                links = self.get_media_links(url, IMAGE_EXTS, log_cb)
-                log_cb(t('log_found_images', count=len(links)))
-                self._download_files(links, thread_folder, "images",
-                                     skip_existing, max_workers, sequential,
-                                     log_cb, progress_cb, status_cb)
-
-            elif media_type == "all_videos":
-                links = self.get_media_links(url, VIDEO_EXTS, log_cb)
-                log_cb(t('log_found_videos', count=len(links)))
-                self._download_files(links, thread_folder, "videos",
-                                     skip_existing, max_workers, sequential,
-                                     log_cb, progress_cb, status_cb)
-
-            else:
-                links = self.get_media_links(url, [media_type], log_cb)
-                log_cb(t('log_found_files', subfolder=media_type, count=len(links)))
-                if links:
-                    self._download_files(links, thread_folder, media_type,
-                                         skip_existing, max_workers, sequential,
-                                         log_cb, progress_cb, status_cb)
+            self._start_job(base_folder, max_workers, dedupe, log_cb, file_cb)
+            thread_folder = self._thread_folder(url, base_folder, log_cb)
+            if interval:
+                interval = max(interval, WATCH_MIN_INTERVAL)
+            min_wait = interval or WATCH_MIN_INTERVAL
+            max_wait = interval or WATCH_MAX_INTERVAL
+            wait     = min_wait
+            seen     = set()
+            read     = False   # whether any poll got the thread
+            log_cb(t('log_watch_start', min=round(min_wait), max=round(max_wait)))
+
+            while not self._is_stopped():
+                by_ext, status, closed = self._poll_thread(url, log_cb)
+                if status == 404:
+                    if read:
+                        log_cb(t('log_watch_gone'))
+                    else:
+                        self._report_thread_error(url, log_cb)
+                    break
+                read = read or by_ext is not None
+
+                new = {}
+                for ext, records in (by_ext or {}).items():
+                    fresh = [r for r in records if r.url not in seen]
+                    if fresh:
+                        new[ext] = fresh
+                        seen.update(r.url for r in fresh)
+
+                if new:
+                    log_cb(t('log_watch_new', count=sum(len(r) for r in new.values())))
+                    self._download_records(new, thread_folder, media_type,
+                                           skip_existing, max_workers, sequential,
+                                           log_cb, progress_cb, status_cb,
+                                           engine, async_limit, order)
+                    wait = min_wait
                 else:
-                    log_cb(t('log_no_ext_files'))
+                    wait = min(max_wait, wait * 1.5)
+
+                if closed:
+                    log_cb(t('log_watch_closed'))
+                    break
+                status_cb(t('status_watching', seconds=round(wait)))
+                self._stop_event.wait(wait)
 
         except Exception as e:
             log_cb(t('log_general_error', error=e))
         finally:
+            self._finish_job()
             done_cb()
 
+    def _start_job(self, base_folder: str, max_workers: int, dedupe: bool, log_cb: LogCb,
+                   file_cb: Optional[FileCb] = None):
+        """Common setup of download()/watch()/download_batch()."""
+        self._job_log  = log_cb
+        self._job_file = file_cb
+        self.metrics.start_job()
+        if dedupe:
+            from mediachdl_dedupe import DedupeIndex
+            self._dedupe = DedupeIndex.for_folder(base_folder)
+
+        ua = random.choice(USER_AGENTS)
+        # segmented downloads open extra connections next to the workers'
+        self._get_session(max_workers * MAX_SEGMENTS).headers["User-Agent"] = ua
+        log_cb(t('log_start_ua', ua=ua))
+
+    def _thread_folder(self, url: str, base_folder: str, log_cb: LogCb) -> str:
+        thread_id  = get_thread_id(url)
+        source     = get_source_name(url)
+        log_cb(t('log_source', source=source, thread_id=thread_id))
+
+        thread_folder = os.path.join(base_folder, thread_id)
+        os.makedirs(thread_folder, exist_ok=True)
+        return thread_folder
+
+    def _finish_job(self):
+        self._job_log  = None
+        self._job_file = None
+        if self._dedupe is not None:
+            self._dedupe.close()
+            self._dedupe = None
+
+    def _download_records(
+        self,
+        by_ext: Dict[str, list],
+        thread_folder: str,
+        media_type: str,
+        skip_existing: bool,
+        max_workers: int,
+        sequential: bool,
+        log_cb: LogCb,
+        progress_cb: ProgCb,
+        status_cb: StatusCb,
+        engine: str = ENGINE_THREADS,
+        async_limit: int = 32,
+        order: str = ORDER_POST,
+    ):
+        """
+        Download the records of media_type from by_ext into their subfolders.
+        All subfolders share one queue, so in all_media mode videos start
+        as soon as workers free up from images, and progress is one total.
+        """
+        groups = _group_by_subfolder(by_ext, media_type, log_cb)
+        items  = self._work_items(thread_folder, thread_folder, groups,
+                                  ORDER_POST if sequential else order, max_workers, log_cb)
+        self._download_files(items, skip_existing, max_workers, sequential,
+                             log_cb, progress_cb, status_cb, engine, async_limit)
+
+    def _work_items(self, job: str, thread_folder: str, groups, order: str = ORDER_POST,
+                    max_workers: int = 1, log_cb: Optional[LogCb] = None) -> list:
+        """
+        WorkItems of job for (subfolder, records) groups, each routed to its
+        subfolder, merged into one list in post order, then arranged per
+        order (see mediachdl_order).
+        """
+        items = []
+        for subfolder, records in groups:
+            folder = os.path.join(thread_folder, subfolder)
+            os.makedirs(folder, exist_ok=True)
+            items.extend(WorkItem(job, record, folder) for record in records)
+        items.sort(key=lambda item: _post_order(item.record))
+        if order != ORDER_POST and items:
+            probed = self._probe_sizes(items, max_workers) if needs_sizes(order) else 0
+            items  = order_items(items, order)
+            if log_cb:
+                log_cb(t('log_order', order=order, probed=probed))
+        self.metrics.expect(item.record for item in items)
+        return items
+
+    def _probe_sizes(self, items: list, max_workers: int) -> int:
+        """
+        Fill in the size of records the site gave none for from a HEAD
+        request each, max_workers at a time and through the host limiters,
+        for at most PROBE_BUDGET seconds so a large thread doesn't hold up
+        its downloads. Returns how many sizes were found; the rest stay unknown.
+        """
+        from dataclasses import replace   # ~10 ms to import; only needed here
+        todo    = iter([item for item in items if not item.record.size])
+        lock    = threading.Lock()
+        expired = threading.Event()   # out of time, or stop requested
+        session = self._get_session()
+        found   = 0
+
+        def _worker():
+            nonlocal found
+            while not expired.is_set():
+                with lock:
+                    item = next(todo, None)
+                if item is None:
+                    return
+                limiter = self._limits.for_url(item.record.url)
+                if not limiter.acquire(expired):
+                    return
+                try:
+                    response = session.head(item.record.url, timeout=10, allow_redirects=True)
+                    if response.status_code in THROTTLE_STATUSES:
+                        limiter.on_throttle(parse_retry_after(response.headers.get("Retry-After")))
+                    elif response.status_code == 200:
+                        limiter.on_success()
+                    size = (int(response.headers.get("Content-Length") or 0)
+                            if response.status_code == 200 else 0)
+                except (*_network_errors, ValueError):
+                    size = 0
+                finally:
+                    limiter.release()
+                if size:
+                    item.record = replace(item.record, size=size)
+                    with lock:
+                        found += 1
+
+        workers  = [threading.Thread(target=_worker, daemon=True)
+                    for _ in range(max(1, max_workers))]
+        deadline = time.monotonic() + PROBE_BUDGET
+        for w in workers:
+            w.start()
+        for w in workers:
+            while w.is_alive() and time.monotonic() < deadline and not self._is_stopped():
+                w.join(0.1)
+        expired.set()
+        for w in workers:
+            w.join()   # a HEAD in flight still lands before the queue is ordered
+        return found
+
+    def download_batch(
+        self,
+        urls: List[str],
+        base_folder: str,
+        media_type: str,
+        skip_existing: bool,
+        max_workers: int,
+        log_cb: LogCb,
+        progress_cb: ProgCb,
+        status_cb: StatusCb,
+        done_cb: Callable[[], None],
+        dedupe: bool = False,
+        host_limits: Optional[Dict[str, int]] = None,
+        file_cb: Optional[FileCb] = None,
+        order: str = ORDER_POST,
+    ):
+        """
+        Download many threads through one shared work queue.
+        All media of all threads is served by a single pool of max_workers
+        threads, taking files round-robin across threads and keeping at most
+        host_limits[host] (default DEFAULT_HOST_LIMIT) transfers per host.
+        Threads are read one by one while the workers already download
+        the files of those read before, so a slow or unreachable thread
+        doesn't leave the pool idle. Progress is reported over the whole
+        batch, its total growing as threads are read; order arranges each
+        thread's files as in download().
+        """
+        self.reset()
+        scheduler = HostScheduler(host_limits, limits=self._limits)
+        folders   = set()
+        feeder    = None
+
+        def _feed():
+            try:
+                for url in urls:
+                    if self._is_stopped():
+                        break
+                    thread_folder = self._thread_folder(url, base_folder, log_cb)
+                    by_ext = self._job_records(url, log_cb)
+                    items  = self._work_items(url, thread_folder,
+                                              _group_by_subfolder(by_ext, media_type, log_cb),
+                                              order, max_workers, log_cb)
+                    folders.update(item.folder for item in items)
+                    scheduler.add_job(url, items)
+                log_cb(t('log_batch_start', threads=len(urls), total=scheduler.total))
+            except Exception as e:
+                log_cb(t('log_general_error', error=e))
+            finally:
+                # the workers exit once the queue is closed and drained
+                scheduler.close()
+
+        try:
+            self._start_job(base_folder, max_workers, dedupe, log_cb, file_cb)
+            feeder = threading.Thread(target=_feed, daemon=True)
+            feeder.start()
+            self._run_scheduler(scheduler, max_workers, skip_existing,
+                                log_cb, progress_cb, status_cb)
+
+        except Exception as e:
+            log_cb(t('log_general_error', error=e))
+        finally:
+            if feeder is not None:
+                feeder.join()
+            for folder in folders:
+                self._release_manifest(folder)
+            self._finish_job()
+            done_cb()
+
+    def _run_scheduler(self, scheduler, max_workers: int, skip_existing: bool,
+                       log_cb: LogCb, progress_cb: ProgCb, status_cb: StatusCb):
+        """
+        Drain scheduler with max_workers threads, reporting each completion
+        against scheduler.total, which grows while jobs are still being added.
+        Failed attempts are deferred on the scheduler per self.retry instead
+        of being retried in place.
+        """
+        done_lock = threading.Lock()
+        completed = 0
+        progress_cb(0, scheduler.total)
+
+        def _worker():
+            nonlocal completed
+            while True:
+                item = scheduler.next_item(self._stop_event)
+                if item is None:
+                    return
+                try:
+                    result = self._try_file(item, skip_existing)
+                    if isinstance(result, _NotReady):
+                        # not an attempt: requeue and take another host's item
+                        scheduler.defer(item, result.wait)
+                        continue
+                    if isinstance(result, Failure):
+                        delay = self._retry_delay(item, result, log_cb)
+                        if delay is not None:
+                            # back in the queue; this worker moves on right away
+                            scheduler.defer(item, delay)
+                            continue
+                        result = self._give_up(item, result), False
+                    result, ok = result
+                except Exception as e:
+                    result, ok = t('log_download_error', link=item.record.url, error=e), False
+                finally:
+                    scheduler.release(item)
+                with done_lock:
+                    completed += 1
+                    log_cb(result)
+                    self._report_file(item, ok, result)
+                    total = scheduler.total
+                    progress_cb(completed, total)
+                    status_cb(t('status_downloading', done=completed, total=total))
+
+        workers = [threading.Thread(target=_worker, daemon=True)
+                   for _ in range(max(1, max_workers))]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
     # ── Link fetching ─────────────────────────────────────────────────────────
 
     def get_media_links(
@@ -198,166 +916,575 @@ class MediaDownloaderCore:
         media_types: List[str],
         log_cb: Optional[LogCb] = None,
     ) -> List[str]:
+        return [r.url for r in _select_records(self.get_media_records(url, log_cb), media_types)]
+
+    def get_all_media_links(
+        self,
+        url: str,
+        log_cb: Optional[LogCb] = None,
+    ) -> Dict[str, List[str]]:
+        """Every media link of the thread, grouped by extension."""
+        return {ext: [r.url for r in records]
+                for ext, records in self.get_media_records(url, log_cb).items()}
+
+    def get_media_records(
+        self,
+        url: str,
+        log_cb: Optional[LogCb] = None,
+    ) -> Dict[str, list]:
+        """
+        Fetch the thread once through its site adapter and return every
+        MediaRecord grouped by extension. Sites with a JSON API are read
+        from it, falling back to the HTML page if the API fails.
+        """
+        by_ext, _, _ = self._poll_thread(url, log_cb)
+        return by_ext or {}
+
+    def _job_records(self, url: str, log_cb: LogCb) -> Dict[str, list]:
+        """
+        get_media_records() for a download job: a thread that can't be read
+        is also reported as failed, so it isn't mistaken for one without media.
+        """
+        by_ext, _, _ = self._poll_thread(url, log_cb)
+        if by_ext is None:
+            self._report_thread_error(url, log_cb)
+        return by_ext or {}
+
+    def _report_thread_error(self, url: str, log_cb: LogCb):
+        message = t('thread_unreadable', url=url)
+        log_cb(message)
+        file_cb = self._job_file
+        if file_cb:
+            file_cb(url, None, False, message)
+
+    def _poll_thread(self, url: str, log_cb: Optional[LogCb] = None):
+        """
+        One conditional fetch of the thread through its site adapter.
+        Returns (by_ext, status, closed): by_ext is None if the thread could
+        not be read, status the HTTP status of the last request (0 on a
+        network error), closed whether the site marks the thread closed
+        or archived.
+        """
+        from mediachdl_sites import get_adapter
+
         def _log(msg):
             if log_cb:
                 log_cb(msg)
 
         try:
-            _log(t('log_fetching_links', types=', '.join(media_types)))
-            headers  = {"User-Agent": random.choice(USER_AGENTS)}
-            response = requests.get(url, headers=headers, verify=False, timeout=15)
-
-            if response.status_code != 200:
-                _log(t('log_page_error', code=response.status_code))
-                return []
-
-            soup        = BeautifulSoup(response.text, "html.parser")
-            media_links = set()
-
-            if "4chan.org" in url:
-                for thumb in soup.find_all("a", class_="fileThumb"):
-                    href = thumb.get("href", "")
-                    if any(href.endswith(f".{ext}") for ext in media_types):
-                        if href.startswith("//"):
-                            full_url = "https:" + href
-                        elif href.startswith("/"):
-                            full_url = "https://boards.4chan.org" + href
-                        else:
-                            full_url = href
-                        media_links.add(full_url)
-            else:
-                for tag in soup.find_all("a", href=True):
-                    href = tag["href"]
-                    if any(href.endswith(f".{ext}") for ext in media_types):
-                        media_links.add(urljoin(url, href))
-
-                for file_elem in soup.find_all(class_="file"):
-                    for a_tag in file_elem.find_all("a", href=True):
-                        href = a_tag["href"]
-                        if any(href.endswith(f".{ext}") for ext in media_types):
-                            media_links.add(urljoin(url, href))
-
-            return list(media_links)
+            adapter = get_adapter(get_source_name(url))
+            _log(t('log_fetching_links', types=', '.join(sorted(MEDIA_EXTS))))
+
+            api_url = adapter.api_url(url)
+            if api_url == url:
+                return self._fetch_records(adapter, url, url, _log)
+            try:
+                by_ext, status, closed = self._fetch_records(adapter, url, api_url, _log)
+            except (*_network_errors, ValueError) as e:
+                # unreachable API host, reset connection, truncated/garbled JSON
+                _log(t('log_link_error', error=e))
+                by_ext, status, closed = None, 0, False
+            if by_ext is None:
+                _log(t('log_api_fallback'))
+                by_ext, status, closed = self._fetch_records(adapter, url, url, _log)
+            return by_ext, status, closed
 
         except Exception as e:
             _log(t('log_link_error', error=e))
-            return []
+            return None, 0, False
+
+    def _fetch_records(self, adapter, url: str, fetch_url: str, _log):
+        """
+        GET fetch_url, revalidating against the page cache, and parse it
+        with adapter. On 304 the previously parsed records are reused.
+        Returns (by_ext, status, closed); by_ext is None when the server
+        does not answer with the page.
+        """
+        session = self._get_session()
+        headers = {"Accept-Encoding": _accept_encoding}
+        headers.update(self._page_cache.conditional_headers(fetch_url))
+        response = session.get(fetch_url, headers=headers, timeout=15)
+        # elapsed runs from sending the request to parsing the headers
+        self.metrics.on_response(fetch_url, response.elapsed.total_seconds())
+
+        if response.status_code == 304:
+            cached = self._page_cache.get(fetch_url)
+            if cached:
+                _log(t('log_page_not_modified'))
+                return cached["records"], 304, cached["closed"]
+
+        if response.status_code != 200:
+            _log(t('log_page_error', code=response.status_code))
+            return None, response.status_code, False
+
+        records, closed = adapter.read(url, response.text)
+        by_ext: Dict[str, list] = {}
+        for record in records:
+            by_ext.setdefault(record.ext, []).append(record)
+
+        etag          = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self._page_cache.put(fetch_url, etag, last_modified, by_ext, closed)
+
+        return by_ext, 200, closed
 
     # ── Downloading ───────────────────────────────────────────────────────────
 
     def _download_files(
         self,
-        links: List[str],
-        thread_folder: str,
-        subfolder: str,
+        items: list,
         skip_existing: bool,
         max_workers: int,
         sequential: bool,
         log_cb: LogCb,
         progress_cb: ProgCb,
         status_cb: StatusCb,
+        engine: str = ENGINE_THREADS,
+        async_limit: int = 32,
     ):
-        if not links:
+        """Download WorkItems (already in queue order) as one job with one progress total."""
+        if not items:
             return
-
-        # ── Sort by post order (chronological by filename numeric part) ──
-        sorted_links = _sort_links_by_post_order(links)
         log_cb(t('log_sequential'))
 
-        folder = os.path.join(thread_folder, subfolder)
-        os.makedirs(folder, exist_ok=True)
+        try:
+            if engine == ENGINE_ASYNCIO and not sequential:
+                try:
+                    from mediachdl_async import download_files_async
+                except ImportError:
+                    log_cb(t('log_async_unavailable'))
+                else:
+                    log_cb(t('log_async_engine', limit=async_limit))
+                    download_files_async(self, items, skip_existing,
+                                         async_limit, log_cb, progress_cb, status_cb)
+                    return
 
-        total     = len(sorted_links)
-        completed = 0
-        errors    = 0
-        progress_cb(0, total)
+            # Sequential is a single worker: files start strictly in order,
+            # only a file waiting for its retry, or for a paused host, is overtaken.
+            workers   = 1 if sequential else max(1, max_workers)
+            scheduler = HostScheduler(default_host_limit=workers, limits=self._limits)
+            scheduler.add_job(items[0].job, items)
+            scheduler.close()
+            self._run_scheduler(scheduler, workers, skip_existing,
+                                log_cb, progress_cb, status_cb)
+        finally:
+            for folder in {item.folder for item in items}:
+                self._release_manifest(folder)
 
-        if sequential or max_workers == 1:
-            # ── Sequential: one file at a time, strictly in order ──
-            for link in sorted_links:
-                if self._is_stopped():
-                    break
-                result, ok = self._download_single_file(link, folder, skip_existing)
-                log_cb(result)
-                completed += 1
-                if not ok:
-                    errors += 1
-                progress_cb(completed, total)
-                status_cb(t('status_downloading', done=completed, total=total))
-        else:
-            # ── Parallel: submit in sorted order, collect results ──
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # Submit in post order so executor picks them up in order when possible
-                futures = [
-                    executor.submit(self._download_single_file, link, folder, skip_existing)
-                    for link in sorted_links
-                ]
-
-                for future in futures:
+    def _manifest(self, folder: str):
+        """The FolderManifest of folder, loaded on first use during a job."""
+        with self._lock:
+            manifest = self._manifests.get(folder)
+            if manifest is None:
+                manifest = self._manifests[folder] = FolderManifest(folder)
+            return manifest
+
+    def _release_manifest(self, folder: str):
+        with self._lock:
+            manifest = self._manifests.pop(folder, None)
+        if manifest is not None:
+            # workers finish out of order; the manifest on disk reads in post order
+            manifest.save(sort_key=_manifest_order)
+
+    def _resolve_target(self, link: str, folder: str, skip_existing: bool,
+                        md5: Optional[str] = None):
+        """
+        Pick the on-disk name for link.
+        Returns (filename, file_path, exists); exists is True only when
+        skip_existing is on and an intact copy is already there (md5 is the
+        site's, checked against the one recorded for that copy).
+        """
+        filename, exists = self._manifest(folder).claim(link.split("/")[-1], skip_existing, md5)
+        return filename, os.path.join(folder, filename), exists
+
+    def _reuse_indexed(self, record, filename: str, file_path: str) -> Optional[str]:
+        """
+        Satisfy record from the dedupe index by linking an existing copy to
+        file_path. Returns the log message on a hit, None otherwise.
+        """
+        if self._dedupe is None:
+            return None
+        hit = self._dedupe.find(record.md5, record.url)
+        if not hit:
+            return None
+        src, md5 = hit
+        if os.path.abspath(src) != os.path.abspath(file_path):
+            from mediachdl_dedupe import link_copy
+            link_copy(src, file_path)
+            self._dedupe.add(md5, file_path, record.url)
+        self._manifest(os.path.dirname(file_path)).record(
+            filename, STATUS_DONE, os.path.getsize(file_path), md5, record.post)
+        return t('file_linked', filename=filename)
+
+    def _finish_file(self, record, filename: str, file_path: str, size: int, hasher):
+        """
+        Book a completed file into the folder manifest and the dedupe index.
+        A file with both hashes has passed _verify() to get here.
+        """
+        md5 = hasher.hexdigest() if hasher is not None else None
+        if self._dedupe is not None and md5:
+            self._dedupe.add(md5, file_path, record.url)
+        self._manifest(os.path.dirname(file_path)).record(
+            filename, STATUS_DONE, size, md5, record.post, verified=bool(md5 and record.md5))
+
+    def _unfinished_file(self, record, filename: str, file_path: str,
+                         status: Optional[str] = None):
+        """Book a cancelled or failed file; a leftover .part stays resumable."""
+        if status is None:
+            status = STATUS_PARTIAL if _part_offset(file_path + PART_SUFFIX) else STATUS_FAILED
+        self._manifest(os.path.dirname(file_path)).record(filename, status, post=record.post)
+
+    def _prepare_item(self, item, skip_existing: bool):
+        """
+        Claim item's target name on its first attempt. Returns a final
+        (message, success_bool) when the file needs no download, else None.
+        """
+        if item.filename is not None:
+            return None
+        record = item.record
+        item.filename, item.file_path, exists = self._resolve_target(
+            record.url, item.folder, skip_existing, record.md5)
+        if exists:
+            return t('file_skipped', filename=item.filename), True
+
+        reused = self._reuse_indexed(record, item.filename, item.file_path)
+        if reused:
+            return reused, True
+        return None
+
+    def _try_file(self, item, skip_existing: bool):
+        """
+        One attempt at a WorkItem. Returns (message, success_bool) once the
+        file is settled, a Failure the caller may retry, or _NotReady when
+        the host can't take the transfer yet; it never waits on the host.
+        """
+        result = self._prepare_item(item, skip_existing)
+        if result is not None:
+            return result
+
+        if self._is_stopped():
+            self._unfinished_file(item.record, item.filename, item.file_path)
+            return t('file_cancelled', filename=item.filename), False
+        limiter = self._limits.for_url(item.record.url)
+        wait    = limiter.try_acquire()
+        if wait:
+            # the scheduler saw the host ready, but another transfer took the token
+            return _NotReady(wait)
+        item.attempts += 1
+        try:
+            return self._attempt_download(item.record, item.filename, item.file_path, limiter)
+        except _network_errors as e:
+            limiter.on_throttle()
+            return Failure(FAIL_NETWORK, type(e).__name__)
+        except Exception as e:
+            return Failure(FAIL_ERROR, str(e))
+        finally:
+            limiter.release()
+
+    def _retry_delay(self, item, failure: Failure, log_cb: LogCb) -> Optional[float]:
+        """Seconds until item's next attempt, or None to give up on it."""
+        self.metrics.on_failure(item.host, failure.kind)
+        if self._is_stopped() or not self.retry.should_retry(failure, item.attempts):
+            return None
+        delay = self.retry.delay(failure, item.attempts)
+        log_cb(t('log_retry', filename=item.filename, reason=failure.detail,
+                 seconds=round(delay, 1), attempt=item.attempts,
+                 retries=self.retry.max_retries))
+        return delay
+
+    def _report_file(self, item, ok: bool, message: str):
+        self.metrics.on_file(ok, item.record)
+        file_cb = self._job_file
+        if file_cb:
+            file_cb(item.record.url, item.filename, ok, message)
+
+    def _give_up(self, item, failure: Failure) -> str:
+        self._unfinished_file(item.record, item.filename, item.file_path,
+                              STATUS_CORRUPT if failure.kind == FAIL_CORRUPT else None)
+        if self._is_stopped():
+            return t('file_cancelled', filename=item.filename)
+        return t('file_failed', attempts=item.attempts, reason=failure.detail,
+                 filename=item.filename)
+
+    def _attempt_download(self, record, filename: str, file_path: str, limiter):
+        """
+        One GET of record into file_path, resuming a leftover .part.
+        Returns (message, success_bool), or a Failure describing why not.
+        """
+        _recover_alloc(file_path)
+        part_path = file_path + PART_SUFFIX
+        offset    = _part_offset(part_path)
+        headers   = {"Range": f"bytes={offset}-"} if offset else {}
+        with self._get_session().get(record.url, stream=True, timeout=10,
+                                     headers=headers) as response:
+            self.metrics.on_response(record.url, response.elapsed.total_seconds())
+            status = response.status_code
+            if status in THROTTLE_STATUSES:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                limiter.on_throttle(retry_after)
+                return Failure(FAIL_THROTTLED, f"HTTP {status}", retry_after)
+
+            content_range = response.headers.get("Content-Range")
+            if _part_complete(status, offset, content_range):
+                return self._complete_part(record, filename, file_path, offset, limiter)
+
+            mode = _resume_mode(status, offset, content_range)
+            if mode is None:
+                return _failure_for(status, part_path)
+            if mode == "wb" and offset:
+                os.remove(part_path)   # the server sent the whole file again
+
+            length = _body_length(response.headers)
+            if mode == "wb" and self._can_segment(record, response, length):
+                return self._download_segmented(record, filename, file_path,
+                                                response, length, limiter)
+            read_size = _chunk_size(length, self.chunk_size)
+            hasher    = self._hasher_for(record)
+            if hasher and mode == "ab":
+                _hash_file(part_path, hasher)
+            out, tmp_path = self._write_target(file_path, mode)
+            written  = offset if mode == "ab" else 0
+            expected = written + length if length else None
+            try:
+                for chunk in _iter_body(response, read_size):
                     if self._is_stopped():
-                        executor.shutdown(wait=False, cancel_futures=True)
                         break
-                    try:
-                        result, ok = future.result()
-                        log_cb(result)
-                        completed += 1
-                        if not ok:
-                            errors += 1
-                    except Exception as e:
-                        log_cb(t('log_download_error', link='?', error=e))
-                        errors += 1
-                        completed += 1
+                    if chunk:
+                        out.write(chunk)
+                        written += len(chunk)
+                        self.metrics.on_bytes(len(chunk))
+                        if hasher:
+                            hasher.update(chunk)
+            except BaseException:
+                self._keep_partial(out, tmp_path, file_path, written)
+                raise
+            return self._settle_output(record, filename, file_path, out, tmp_path,
+                                       written, expected, hasher, limiter)
 
-                    progress_cb(completed, total)
-                    status_cb(t('status_downloading', done=completed, total=total))
+    # ── Disk stage ────────────────────────────────────────────────────────────
 
-    def _download_single_file(
-        self,
-        link: str,
-        folder: str,
-        skip_existing: bool,
-        max_retries: int = 3,
-    ):
-        """Returns (message, success_bool)."""
-        filename  = link.split("/")[-1]
-        file_path = os.path.join(folder, filename)
-
-        if skip_existing and os.path.exists(file_path):
-            return t('file_skipped', filename=filename), True
-
-        if not skip_existing and os.path.exists(file_path):
-            base, ext = os.path.splitext(filename)
-            counter   = 1
-            new_name  = f"{base}_copy{ext}"
-            new_path  = os.path.join(folder, new_name)
-            while os.path.exists(new_path):
-                new_name = f"{base}_copy{counter}{ext}"
-                new_path = os.path.join(folder, new_name)
-                counter += 1
-            filename  = new_name
-            file_path = new_path
-
-        for attempt in range(max_retries):
+    def _write_target(self, file_path: str, mode: str):
+        """
+        Open a writer handle for a single-stream body. Returns (handle, path).
+        The body goes straight to the .part, so whatever reached the disk
+        resumes on the next run even if this one is killed; the final name
+        only appears once the file is complete.
+        """
+        part_path = file_path + PART_SUFFIX
+        return self.writer.open(part_path, mode), part_path
+
+    def _keep_partial(self, out, tmp_path: str, file_path: str, size: int):
+        """
+        Flush out and keep the first size bytes as a resumable .part.
+        A preallocated file whose writes failed may hold gaps, so it is
+        dropped instead and the write error raised.
+        """
+        try:
+            out.close(sync=False)
+        except Exception:
+            if tmp_path != file_path + PART_SUFFIX and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        _keep_prefix(tmp_path, file_path + PART_SUFFIX, size)
+
+    def _hasher_for(self, record):
+        """An md5 to feed the body through: for the dedupe index or to check the site's."""
+        if self._dedupe is not None or record.md5:
+            return hashlib.md5()
+        return None
+
+    def _verify(self, record, hasher) -> Optional[Failure]:
+        """A Failure if the streamed body's md5 is not the one the site publishes."""
+        if hasher is None or not record.md5 or hasher.hexdigest() == record.md5:
+            return None
+        return Failure(FAIL_CORRUPT, "md5 mismatch")
+
+    def _complete_part(self, record, filename: str, file_path: str, size: int, limiter):
+        """
+        Finish a .part the server says is whole already (416 to its Range).
+        Returns like _attempt_download.
+        """
+        part_path = file_path + PART_SUFFIX
+        hasher    = self._hasher_for(record)
+        if hasher is not None:
+            _hash_file(part_path, hasher)
+            failure = self._verify(record, hasher)
+            if failure is not None:
+                os.remove(part_path)
+                return failure
+        os.replace(part_path, file_path)
+        self._finish_file(record, filename, file_path, size, hasher)
+        limiter.on_success()
+        return t('file_saved', filename=filename), True
+
+    def _settle_output(self, record, filename: str, file_path: str, out, tmp_path: str,
+                       written: int, expected: Optional[int], hasher, limiter):
+        """
+        Finish a streamed transfer of written bytes: give the file its final
+        name if the body was complete and passes _verify(), else keep what
+        arrived as a .part (a body with a wrong md5 is dropped whole).
+        Returns like _attempt_download.
+        """
+        if self._is_stopped() or (expected is not None and written != expected):
+            self._keep_partial(out, tmp_path, file_path, written)
             if self._is_stopped():
+                self._unfinished_file(record, filename, file_path)
                 return t('file_cancelled', filename=filename), False
+            return Failure(FAIL_NETWORK, f"short body ({written} of {expected} bytes)")
+        failure = self._verify(record, hasher)
+        if failure is not None:
+            _discard(out, tmp_path)
+            return failure
+        out.commit(file_path)
+        self._finish_file(record, filename, file_path, written, hasher)
+        limiter.on_success()
+        return t('file_saved', filename=filename), True
+
+    # ── Segmented downloads ───────────────────────────────────────────────────
+
+    def _can_segment(self, record, response, length: int) -> bool:
+        """
+        True if this 200 response's file is worth and safe to fetch in byte
+        ranges. Hosts are those of record URLs, as when a refusal is recorded,
+        even if the server redirected elsewhere.
+        """
+        return (length >= SEGMENT_THRESHOLD
+                and response.headers.get("Accept-Ranges", "").lower() == "bytes"
+                and not response.headers.get("Content-Encoding")
+                and host_of(record.url) not in self._unsegmented)
+
+    def _download_segmented(self, record, filename: str, file_path: str, response,
+                            length: int, limiter):
+        """
+        Fetch record over several connections into a preallocated file.
+        The open response streams from byte 0. Up to MAX_SEGMENTS - 1 helper
+        threads each wait for a host slot like any transfer, then take the
+        second half of the largest range still unread and fetch it with a
+        Range GET; whatever no helper takes, the first stream reads itself,
+        so a busy host degrades to one stream instead of waiting.
+        On failure or stop the gap-free prefix becomes the .part, so the
+        retry resumes it as a single stream. The prefix is also noted in a
+        PREFIX_SUFFIX file as it grows, so after a crash or kill the next
+        run recovers it through _recover_alloc().
+        Returns like _attempt_download.
+        """
+        seg_path    = file_path + ALLOC_SUFFIX
+        prefix_path = file_path + PREFIX_SUFFIX
+        segments    = [[0, length - 1, 0]]   # [start, end, next byte], end shrinks when split
+        noted       = 0                      # prefix last noted in prefix_path
+        errors      = []
+        lock        = threading.Lock()
+        abort       = threading.Event()      # error or stop: every stream quits
+        closing     = threading.Event()      # first stream done: no new splits
+        read_size   = _chunk_size(length, self.chunk_size)
+        session     = self._get_session()
+        hasher      = self._hasher_for(record)
+        out         = self.writer.open(seg_path, "wb", preallocate=length)
+
+        def _note_prefix():
+            nonlocal noted
+            with lock:
+                prefix = _contiguous_bytes(segments)
+                if prefix - noted >= PREFIX_NOTE_BYTES:
+                    noted = prefix
+                    out.note(prefix_path, str(prefix))
+
+        def _stream(segment, body, hasher=None):
             try:
-                headers  = {"User-Agent": random.choice(USER_AGENTS)}
-                response = requests.get(link, stream=True, timeout=10,
-                                        headers=headers, verify=False)
-                if response.status_code == 200:
-                    with open(file_path, "wb") as f:
-                        for chunk in response.iter_content(1024):
-                            if self._is_stopped():
-                                f.close()
-                                if os.path.exists(file_path):
-                                    os.remove(file_path)
-                                return t('file_cancelled', filename=filename), False
-                            if chunk:
-                                f.write(chunk)
-                    return t('file_saved', filename=filename), True
-            except Exception:
-                pass
-            time.sleep(2)
-
-        return t('file_failed', retries=max_retries, filename=filename), False
+                for chunk in body:
+                    if abort.is_set() or self._is_stopped():
+                        return
+                    # a split may have moved the end; overlapping bytes are the same bytes
+                    chunk = chunk[:segment[1] + 1 - segment[2]]
+                    out.write(chunk, segment[2])
+                    segment[2] += len(chunk)
+                    self.metrics.on_bytes(len(chunk))
+                    if hasher:
+                        hasher.update(chunk)
+                    _note_prefix()
+                    if segment[2] > segment[1]:
+                        return
+            except Exception as e:
+                errors.append(e)
+                abort.set()
+            finally:
+                body.close()
+
+        def _split():
+            with lock:
+                victim = max(segments, key=lambda seg: seg[1] - seg[2])
+                left   = victim[1] + 1 - victim[2]
+                if left < 2 * SEGMENT_MIN_SIZE:
+                    return None
+                start     = victim[2] + left // 2
+                segment   = [start, victim[1], start]
+                victim[1] = start - 1
+                segments.append(segment)
+                return segment
+
+        def _ranged_body(start: int, end: int):
+            headers = {"Range": f"bytes={start}-{end}"}
+            with session.get(record.url, stream=True, timeout=10, headers=headers) as r:
+                content_range = r.headers.get("Content-Range") or ""
+                if r.status_code != 206 or not content_range.startswith(f"bytes {start}-"):
+                    raise _RangeRefused(f"HTTP {r.status_code}")
+                yield from _iter_body(r, read_size)
+
+        def _helper():
+            while not closing.is_set() and limiter.acquire(closing):
+                try:
+                    segment = None if abort.is_set() else _split()
+                    if segment is None:
+                        return
+                    _stream(segment, _ranged_body(segment[0], length - 1))
+                finally:
+                    limiter.release()
+
+        helpers = [threading.Thread(target=_helper, daemon=True)
+                   for _ in range(MAX_SEGMENTS - 1)]
+        for helper in helpers:
+            helper.start()
+        # the first stream runs from byte 0, so it can feed the md5 in order
+        _stream(segments[0], _iter_body(response, read_size), hasher)
+        closing.set()
+        for helper in helpers:
+            helper.join()
+
+        try:
+            return self._settle_segments(record, filename, file_path, out, segments,
+                                         errors, hasher, length, limiter)
+        finally:
+            if os.path.exists(prefix_path):
+                os.remove(prefix_path)
+
+    def _settle_segments(self, record, filename: str, file_path: str, out, segments,
+                         errors, hasher, length: int, limiter):
+        """The _settle_output() of a segmented download. Returns like _attempt_download."""
+        seg_path = file_path + ALLOC_SUFFIX
+        if self._is_stopped() or errors or any(seg[2] <= seg[1] for seg in segments):
+            self._keep_partial(out, seg_path, file_path, _contiguous_bytes(segments))
+            if self._is_stopped():
+                self._unfinished_file(record, filename, file_path)
+                return t('file_cancelled', filename=filename), False
+            error = errors[0] if errors else None
+            if isinstance(error, _RangeRefused):
+                self._unsegmented.add(host_of(record.url))
+                return Failure(FAIL_RANGE, f"segment {error}")
+            if error is None or isinstance(error, _network_errors):
+                limiter.on_throttle()
+                return Failure(FAIL_NETWORK, type(error).__name__ if error else "short segment")
+            return Failure(FAIL_ERROR, str(error))
+
+        if hasher is not None:
+            # md5 only runs in byte order: the helpers' ranges are read back once
+            out.close()
+            _hash_file(seg_path, hasher, segments[0][2])
+            failure = self._verify(record, hasher)
+            if failure is not None:
+                os.remove(seg_path)
+                return failure
+        out.commit(file_path)
+        self._finish_file(record, filename, file_path, length, hasher)
+        limiter.on_success()
+        return t('file_saved', filename=filename), True
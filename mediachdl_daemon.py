@@ -0,0 +1,440 @@
+"""
+mediachdl_daemon.py — long-running download daemon with a localhost HTTP job API
+
+One MediaDownloaderCore stays alive for the daemon's lifetime, so its
+connection pool, page cache and per-host limits carry over from job to
+job. Jobs run one after another; each job is parallel inside. Watch jobs
+follow a thread for hours, so each runs beside the queue on a core of its
+own that shares the daemon core's connections, page cache and host limits
+(its transfers are not counted in /metrics).
+
+    POST   /jobs               {"url": "..."} or {"urls": [...]}, plus options
+    GET    /jobs               all jobs
+    GET    /jobs/<id>          one job
+    DELETE /jobs/<id>          cancel (queued: dropped, running: stopped)
+    GET    /jobs/<id>/events   JSON lines, streamed until the job ends;
+                               ?since=N resumes after event N
+    GET    /metrics            transfer metrics, Prometheus text format
+    GET    /metrics.json       the same as JSON
+"""
+
+import os
+import json
+import time
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from mediachdl_core import (MediaDownloaderCore, ENGINE_ASYNCIO, ENGINE_THREADS,
+                            MEDIA_TYPE_NAMES, is_valid_url)
+from mediachdl_order import ORDER_NAMES, ORDER_POST
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+STATE_QUEUED    = "queued"
+STATE_RUNNING   = "running"
+STATE_DONE      = "done"
+STATE_FAILED    = "failed"       # finished, some files failed or a thread was unreadable
+STATE_CANCELLED = "cancelled"
+FINAL_STATES    = (STATE_DONE, STATE_FAILED, STATE_CANCELLED)
+
+# Oldest finished jobs are forgotten beyond this many
+MAX_FINISHED_JOBS = 200
+
+
+class Job:
+    """One submitted download and its event log."""
+
+    def __init__(self, job_id: int, urls: List[str], options: dict):
+        self.id        = job_id
+        self.urls      = urls
+        self.options   = options
+        self.state     = STATE_QUEUED
+        self.submitted = time.time()
+        self.started: Optional[float]  = None
+        self.finished: Optional[float] = None
+        self.done      = 0
+        self.total     = 0
+        self.ok        = 0
+        self.failed    = 0
+        self.cancel_requested = False
+        self.events: List[dict] = []
+        self._cond = threading.Condition()
+
+    def emit(self, event: str, **fields):
+        with self._cond:
+            self.events.append({"seq": len(self.events) + 1, "event": event,
+                                "ts": round(time.time(), 3), **fields})
+            self._cond.notify_all()
+
+    def set_state(self, state: str):
+        with self._cond:
+            self.state = state
+            if state == STATE_RUNNING:
+                self.started = time.time()
+            elif state in FINAL_STATES:
+                self.finished = time.time()
+        self.emit("state", state=state)
+
+    def events_since(self, seq: int, timeout: float):
+        """Events after seq, waiting up to timeout for new ones. Returns (events, finished)."""
+        with self._cond:
+            if len(self.events) <= seq and self.state not in FINAL_STATES:
+                self._cond.wait(timeout)
+            return self.events[seq:], self.state in FINAL_STATES
+
+    # ── Core callbacks ────────────────────────────────────────────────────────
+
+    def log(self, message: str):
+        self.emit("log", message=message)
+
+    def progress(self, done: int, total: int):
+        self.done, self.total = done, total
+        self.emit("progress", done=done, total=total)
+
+    def status(self, message: str):
+        self.emit("status", message=message)
+
+    def file(self, url: str, filename, ok: bool, message: str):
+        with self._cond:
+            if ok:
+                self.ok += 1
+            else:
+                self.failed += 1
+        self.emit("file", url=url, filename=filename, ok=ok, message=message)
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id, "urls": self.urls, "state": self.state,
+            "options": self.options, "done": self.done, "total": self.total,
+            "ok": self.ok, "failed": self.failed, "events": len(self.events),
+            "submitted": self.submitted, "started": self.started, "finished": self.finished,
+        }
+
+
+def _job_options(payload: dict, base_folder: str) -> dict:
+    """Validate a POST /jobs body into download options. Raises ValueError."""
+    host_limits = payload.get("host_limits") or {}
+    if not isinstance(host_limits, dict):
+        raise ValueError("host_limits must be an object of host: limit")
+    options = {
+        "output":        payload.get("output") or base_folder,
+        "media_type":    payload.get("media_type", "all_media"),
+        "max_workers":   int(payload.get("max_workers", 3)),
+        "skip_existing": bool(payload.get("skip_existing", False)),
+        "sequential":    bool(payload.get("sequential", False)),
+        "engine":        payload.get("engine", ENGINE_THREADS),
+        "async_limit":   int(payload.get("async_limit", 32)),
+        "order":         payload.get("order", ORDER_POST),
+        "dedupe":        bool(payload.get("dedupe", False)),
+        "watch":         bool(payload.get("watch", False)),
+        "interval":      payload.get("interval"),
+        "host_limits":   {str(h): int(n) for h, n in host_limits.items()},
+    }
+    if options["media_type"] not in MEDIA_TYPE_NAMES:
+        raise ValueError(f"media_type must be one of {', '.join(MEDIA_TYPE_NAMES)}")
+    if options["engine"] not in (ENGINE_THREADS, ENGINE_ASYNCIO):
+        raise ValueError(f"engine must be {ENGINE_THREADS} or {ENGINE_ASYNCIO}")
+    if options["order"] not in ORDER_NAMES:
+        raise ValueError(f"order must be one of {', '.join(ORDER_NAMES)}")
+    if options["max_workers"] < 1 or options["async_limit"] < 1:
+        raise ValueError("max_workers and async_limit must be positive")
+    if options["interval"] is not None:
+        options["interval"] = float(options["interval"])
+    return options
+
+
+class DownloadDaemon:
+    """Job queue in front of one long-lived MediaDownloaderCore."""
+
+    def __init__(self, base_folder: str, core: Optional[MediaDownloaderCore] = None):
+        self.base_folder = base_folder
+        self.core        = core or MediaDownloaderCore()
+        self._lock    = threading.Lock()
+        self._jobs: Dict[int, Job] = {}
+        self._queue   = queue.Queue()
+        self._next_id = 1
+        self._current: Optional[Job] = None
+        self._watches: Dict[int, tuple] = {}   # job id -> (core, thread)
+        self._closed  = threading.Event()
+        self._runner  = threading.Thread(target=self._run, daemon=True)
+        self._runner.start()
+
+    # ── Job API ───────────────────────────────────────────────────────────────
+
+    def submit(self, payload: dict) -> Job:
+        urls = payload.get("urls") or ([payload["url"]] if payload.get("url") else [])
+        if not isinstance(urls, list) or not urls:
+            raise ValueError("url or urls is required")
+        invalid = [url for url in urls if not isinstance(url, str) or not is_valid_url(url)]
+        if invalid:
+            raise ValueError(f"invalid URL: {invalid[0]}")
+        options = _job_options(payload, self.base_folder)
+        if options["watch"] and len(urls) > 1:
+            raise ValueError("watch takes a single URL")
+
+        with self._lock:
+            job = Job(self._next_id, urls, options)
+            self._jobs[job.id] = job
+            self._next_id += 1
+        job.emit("state", state=STATE_QUEUED)
+        if options["watch"]:
+            self._start_watch(job)
+        else:
+            self._queue.put(job)
+        return job
+
+    def get(self, job_id: int) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: int) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None or job.state in FINAL_STATES:
+            return job
+        with self._lock:
+            job.cancel_requested = True
+            if job.state == STATE_QUEUED:
+                job.set_state(STATE_CANCELLED)
+            elif self._current is job:
+                self.core.request_stop()
+            elif job.id in self._watches:
+                self._watches[job.id][0].request_stop()
+        return job
+
+    def close(self):
+        """Cancel everything and stop the runner; the core's pool is released."""
+        self._closed.set()
+        for job in self.jobs():
+            self.cancel(job.id)
+        self._queue.put(None)
+        self._runner.join()
+        with self._lock:
+            watches = [thread for _, thread in self._watches.values()]
+        for thread in watches:
+            thread.join()
+        self.core.close()
+
+    # ── Runner ────────────────────────────────────────────────────────────────
+
+    def _run(self):
+        while not self._closed.is_set():
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                if job.cancel_requested:
+                    continue
+                self._current = job
+                job.set_state(STATE_RUNNING)
+            try:
+                self._execute(job, self.core)
+            finally:
+                with self._lock:
+                    self._current = None
+            self._forget_finished()
+
+    def _start_watch(self, job: Job):
+        """
+        Run a watch job on a thread and core of its own: it can last for
+        hours, and the core's single stop flag must not cancel other jobs.
+        The watch core shares the daemon core's session, page cache and
+        limits, so every job keeps to the same per-host window.
+        """
+        core = MediaDownloaderCore(chunk_size=self.core.chunk_size, retry=self.core.retry,
+                                   share_with=self.core)
+        thread = threading.Thread(target=self._run_watch, args=(job, core), daemon=True)
+        with self._lock:
+            self._watches[job.id] = (core, thread)
+            job.set_state(STATE_RUNNING)
+        thread.start()
+
+    def _run_watch(self, job: Job, core: MediaDownloaderCore):
+        try:
+            self._execute(job, core)
+        finally:
+            core.close()
+            with self._lock:
+                del self._watches[job.id]
+        self._forget_finished()
+
+    def _execute(self, job: Job, core: MediaDownloaderCore):
+        """Run a job that is already marked running on core and set its final state."""
+        try:
+            self._run_job(job, core)
+        except Exception as e:
+            job.emit("error", message=str(e))
+        if job.cancel_requested or core.stop_requested:
+            job.set_state(STATE_CANCELLED)
+        else:
+            job.set_state(STATE_FAILED if job.failed else STATE_DONE)
+
+    def _run_job(self, job: Job, core: MediaDownloaderCore):
+        options = job.options
+
+        def _log(message):
+            # download() clears the stop flag on entry; a cancel that raced
+            # it is re-applied on the first log line
+            if job.cancel_requested and not core.stop_requested:
+                core.request_stop()
+            job.log(message)
+
+        os.makedirs(options["output"], exist_ok=True)
+        common = dict(
+            base_folder   = options["output"],
+            media_type    = options["media_type"],
+            skip_existing = options["skip_existing"],
+            max_workers   = options["max_workers"],
+            log_cb        = _log,
+            progress_cb   = job.progress,
+            status_cb     = job.status,
+            done_cb       = lambda: None,
+            dedupe        = options["dedupe"],
+            file_cb       = job.file,
+            order         = options["order"],
+        )
+        if len(job.urls) > 1:
+            core.download_batch(urls=job.urls, host_limits=options["host_limits"], **common)
+            return
+        extra = {"interval": options["interval"]} if options["watch"] else {}
+        run   = core.watch if options["watch"] else core.download
+        run(url=job.urls[0], sequential=options["sequential"], engine=options["engine"],
+            async_limit=options["async_limit"], **common, **extra)
+
+    def _forget_finished(self):
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items()
+                        if job.state in FINAL_STATES]
+            for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+                del self._jobs[job_id]
+
+
+# ── HTTP API ──────────────────────────────────────────────────────────────────
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "mediachdl"
+
+    @property
+    def daemon(self) -> DownloadDaemon:
+        return self.server.daemon
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_text(self, status: int, text: str, content_type: str):
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status: int, body):
+        self._send_text(status, json.dumps(body, ensure_ascii=False),
+                        "application/json; charset=utf-8")
+
+    def _route(self):
+        """
+        (found, job, tail) for /jobs and /jobs/<id>[/tail]. job and tail are
+        None for /jobs itself; job is None for an unknown id.
+        """
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        if not parts or parts[0] != "jobs":
+            return False, None, None
+        if len(parts) == 1:
+            return True, None, None
+        if not parts[1].isdigit():
+            return False, None, None
+        return True, self.daemon.get(int(parts[1])), "/".join(parts[2:])
+
+    def do_GET(self):
+        path    = urlparse(self.path).path
+        metrics = self.daemon.core.metrics
+        if path == "/metrics":
+            return self._send_text(200, metrics.to_prometheus(),
+                                   "text/plain; version=0.0.4; charset=utf-8")
+        if path == "/metrics.json":
+            return self._send_text(200, metrics.to_json(), "application/json; charset=utf-8")
+
+        found, job, tail = self._route()
+        if not found:
+            return self._send_json(404, {"error": "not found"})
+        if job is None and tail is None:
+            return self._send_json(200, [j.summary() for j in self.daemon.jobs()])
+        if job is None:
+            return self._send_json(404, {"error": "no such job"})
+        if tail == "":
+            return self._send_json(200, job.summary())
+        if tail == "events":
+            return self._stream_events(job)
+        self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        found, job, tail = self._route()
+        if not found or tail is not None:
+            return self._send_json(404, {"error": "not found"})
+        # a JSON content type can't be sent cross-site without a CORS
+        # preflight, so web pages can't submit jobs to the local daemon
+        if not self.headers.get("Content-Type", "").startswith("application/json"):
+            return self._send_json(415, {"error": "expected application/json"})
+        try:
+            length  = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(payload, dict):
+                raise ValueError("expected a JSON object")
+            job = self.daemon.submit(payload)
+        except (ValueError, TypeError) as e:
+            return self._send_json(400, {"error": str(e)})
+        self._send_json(202, job.summary())
+
+    def do_DELETE(self):
+        found, job, tail = self._route()
+        if not found or job is None or tail:
+            return self._send_json(404, {"error": "no such job"})
+        self._send_json(200, self.daemon.cancel(job.id).summary())
+
+    def _stream_events(self, job: Job):
+        query = parse_qs(urlparse(self.path).query)
+        try:
+            seq = int(query.get("since", ["0"])[0])
+        except ValueError:
+            seq = 0
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            while True:
+                events, finished = job.events_since(seq, timeout=15)
+                if events:
+                    self.wfile.write("".join(json.dumps(e, ensure_ascii=False) + "\n"
+                                             for e in events).encode("utf-8"))
+                    self.wfile.flush()
+                    seq = events[-1]["seq"]
+                elif finished:
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+
+def serve(base_folder: str, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+          core: Optional[MediaDownloaderCore] = None, ready_cb=None):
+    """Run the daemon until interrupted. ready_cb(address) fires once listening."""
+    daemon = DownloadDaemon(base_folder, core)
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.daemon = daemon
+    if ready_cb:
+        ready_cb(server.server_address)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        daemon.close()
@@ -0,0 +1,111 @@
+"""
+mediachdl_dedupe.py — content-addressed index of downloaded files for Media Downloader
+"""
+
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+INDEX_FILENAME = ".mediachdl_index.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    md5   TEXT NOT NULL,
+    size  INTEGER NOT NULL,
+    path  TEXT NOT NULL PRIMARY KEY,
+    url   TEXT,
+    added REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_md5 ON files (md5);
+CREATE INDEX IF NOT EXISTS files_url ON files (url);
+"""
+
+
+def _reflink(src: str, dst: str) -> bool:
+    """Copy-on-write clone (Linux FICLONE). False where unsupported."""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    FICLONE = 0x40049409
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        return True
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        return False
+
+
+def link_copy(src: str, dst: str) -> str:
+    """
+    Materialize src at dst without re-downloading it: hardlink, else
+    reflink, else a plain copy. Returns the method used.
+    """
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:
+        pass
+    if _reflink(src, dst):
+        return "reflink"
+    shutil.copyfile(src, dst)
+    return "copy"
+
+
+class DedupeIndex:
+    """
+    Persistent md5 -> file index shared by every thread folder under one
+    download root. Files whose md5 is not published by the site are also
+    found by URL. Entries whose file vanished or changed size are dropped
+    on lookup.
+    """
+
+    def __init__(self, path: str):
+        self.path  = path
+        self._lock = threading.Lock()
+        self._db   = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    @classmethod
+    def for_folder(cls, base_folder: str) -> "DedupeIndex":
+        return cls(os.path.join(base_folder, INDEX_FILENAME))
+
+    def find(self, md5: Optional[str] = None, url: Optional[str] = None):
+        """(path, md5) of an intact, already downloaded copy, or None."""
+        if md5:
+            query, key = "SELECT path, size, md5 FROM files WHERE md5 = ?", md5
+        elif url:
+            query, key = "SELECT path, size, md5 FROM files WHERE url = ?", url
+        else:
+            return None
+
+        with self._lock:
+            rows = self._db.execute(query, (key,)).fetchall()
+            for path, size, found_md5 in rows:
+                try:
+                    if os.path.getsize(path) == size:
+                        return path, found_md5
+                except OSError:
+                    pass
+                self._db.execute("DELETE FROM files WHERE path = ?", (path,))
+            if rows:
+                self._db.commit()
+        return None
+
+    def add(self, md5: str, path: str, url: Optional[str] = None):
+        size = os.path.getsize(path)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO files (md5, size, path, url, added) VALUES (?, ?, ?, ?, ?)",
+                (md5, size, os.path.abspath(path), url, time.time()),
+            )
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
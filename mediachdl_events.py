@@ -0,0 +1,78 @@
+"""
+mediachdl_events.py — coalescing progress/status aggregator for Media Downloader
+"""
+
+import threading
+from dataclasses import dataclass, replace
+from typing import Optional
+
+from language_en import LANG
+
+# file_cb messages counted as skipped rather than downloaded
+_SKIPPED_PREFIX = LANG['file_skipped'].split("{")[0]
+
+
+@dataclass(frozen=True)
+class ProgressState:
+    """Latest job state as seen by a UI frame."""
+    done: int             = 0
+    total: int            = 0
+    status: Optional[str] = None
+    downloaded: int       = 0
+    skipped: int          = 0
+    failed: int           = 0
+
+
+class ProgressBus:
+    """
+    Thread-safe latest-value store between the core's callbacks and a UI.
+    Its progress/status/file methods are passed to the core as
+    progress_cb/status_cb/file_cb and only overwrite counters, so workers
+    can publish at any rate; the UI calls take() at its own frame rate and
+    renders the newest state once per change.
+    """
+
+    def __init__(self):
+        self._lock    = threading.Lock()
+        self._state   = ProgressState()
+        self._version = 0
+        self._taken   = 0
+
+    def reset(self):
+        with self._lock:
+            self._state    = ProgressState()
+            self._version += 1
+
+    def _update(self, **changes):
+        with self._lock:
+            self._state    = replace(self._state, **changes)
+            self._version += 1
+
+    # ── Core callbacks ────────────────────────────────────────────────────────
+
+    def progress(self, done: int, total: int):
+        self._update(done=done, total=total)
+
+    def status(self, message: str):
+        self._update(status=message)
+
+    def file(self, url: str, filename, ok: bool, message: str):
+        if not ok:
+            counter = "failed"
+        elif message.startswith(_SKIPPED_PREFIX):
+            counter = "skipped"
+        else:
+            counter = "downloaded"
+        with self._lock:
+            self._state    = replace(self._state, **{counter: getattr(self._state, counter) + 1})
+            self._version += 1
+
+    # ── UI side ───────────────────────────────────────────────────────────────
+
+    def take(self) -> Optional[ProgressState]:
+        """The current state if it changed since the last take(), else None."""
+        with self._lock:
+            if self._version == self._taken:
+                return None
+            self._taken = self._version
+            return self._state
@@ -5,13 +5,18 @@ Requires: pip install customtkinter requests beautifulsoup4
 
 import os
 import time
+import shutil
+import tempfile
 import threading
 import webbrowser
+from collections import deque
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
 
 from language_en import LANG
-from mediachdl_core import MediaDownloaderCore, is_valid_url
+from mediachdl_core import MediaDownloaderCore, is_valid_url, warm_up
+from mediachdl_events import ProgressBus
+from mediachdl_metrics import format_bytes, format_eta
 
 # ── Theme ─────────────────────────────────────────────────────────────────────
 ctk.set_appearance_mode("dark")
@@ -27,6 +32,12 @@ SUCCESS  = "#22C55E"
 ERROR    = "#EF4444"
 WARN     = "#F59E0B"
 
+# Lines kept in the log view; the full log is spooled to a temp file
+LOG_MAX_LINES     = 2000
+LOG_POLL_MS       = 80
+PROGRESS_FRAME_MS = 100   # progress/status/stat cards are redrawn at most 10×/s
+METRICS_FRAME_MS  = 1000  # speed / ETA / latency cards
+
 # ─────────────────────────────────────────────────────────────────────────────
 
 MEDIA_TYPES = [
@@ -47,6 +58,17 @@ def t(key: str, **kwargs) -> str:
     return s.format(**kwargs) if kwargs else s
 
 
+# Fixed text in front of the first placeholder of every error message,
+# used by the "errors only" log filter
+ERROR_PREFIXES = tuple(LANG[key].split("{")[0] for key in (
+    'file_failed', 'log_download_error', 'log_general_error',
+    'log_page_error', 'log_link_error', 'log_check_error', 'thread_unreadable'))
+
+
+def is_error_line(msg: str) -> bool:
+    return msg.startswith(ERROR_PREFIXES)
+
+
 class StatCard(ctk.CTkFrame):
     def __init__(self, master, label: str, color: str = TEXT, **kwargs):
         super().__init__(master, fg_color=BG_CARD, corner_radius=10, **kwargs)
@@ -57,7 +79,7 @@ class StatCard(ctk.CTkFrame):
         ctk.CTkLabel(self, text=label, text_color=TEXT_DIM,
                      font=("Consolas", 10)).pack(pady=(0, 10))
 
-    def set(self, val: int):
+    def set(self, val: int | str):
         self.value_lbl.configure(text=str(val))
 
 
@@ -72,11 +94,18 @@ class MediaDownloaderApp(ctk.CTk):
 
         self._core           = MediaDownloaderCore()
         self._is_downloading = False
-        self._log_queue: list[str] = []
+        self._log_queue: deque = deque()   # filled by worker threads, drained by _poll_log
+        self._log_lines      = 0           # lines currently in log_box
+        self._log_spool      = tempfile.TemporaryFile("w+", encoding="utf-8", suffix=".log")
+        self._progress       = ProgressBus()
         self._stats          = {"found": 0, "downloaded": 0, "errors": 0, "skipped": 0}
 
         self._build_ui()
         self._poll_log()
+        self._poll_progress()
+        self._poll_metrics()
+        # the network stack loads in the background once the window is up
+        self.after(250, lambda: threading.Thread(target=warm_up, daemon=True).start())
 
     # ── UI ────────────────────────────────────────────────────────────────────
 
@@ -193,6 +222,13 @@ class MediaDownloaderApp(ctk.CTk):
                         fg_color=ACCENT, hover_color="#1A5FA8").pack(
             side="left", padx=(0, 24))
 
+        self.watch_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(adv_row, text=t('label_watch'),
+                        variable=self.watch_var,
+                        text_color=TEXT, font=("Consolas", 11),
+                        fg_color=ACCENT, hover_color="#1A5FA8").pack(
+            side="left", padx=(0, 24))
+
         ctk.CTkLabel(adv_row, text=t('label_threads'),
                      text_color=TEXT_DIM, font=("Consolas", 11)).pack(side="left")
 
@@ -262,6 +298,14 @@ class MediaDownloaderApp(ctk.CTk):
                      font=("Consolas", 10, "bold"), text_color=ACCENT).grid(
             row=0, column=0, sticky="w", padx=12, pady=(10, 4))
 
+        self.errors_only_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(log_wrap, text=t('label_errors_only'),
+                        variable=self.errors_only_var, command=self._refilter_log,
+                        text_color=TEXT_DIM, font=("Consolas", 10),
+                        checkbox_width=16, checkbox_height=16,
+                        fg_color=ACCENT, hover_color="#1A5FA8").grid(
+            row=0, column=0, sticky="e", padx=12, pady=(10, 4))
+
         self.log_box = ctk.CTkTextbox(
             log_wrap, fg_color=BG_DARK, text_color=TEXT,
             font=("Consolas", 11), corner_radius=8,
@@ -281,8 +325,12 @@ class MediaDownloaderApp(ctk.CTk):
         self.card_downloaded = StatCard(stats_col, t('card_downloaded'), color=SUCCESS)
         self.card_errors     = StatCard(stats_col, t('card_errors'),     color=ERROR)
         self.card_skipped    = StatCard(stats_col, t('card_skipped'),    color=WARN)
+        self.card_speed      = StatCard(stats_col, t('card_speed'),      color=ACCENT)
+        self.card_eta        = StatCard(stats_col, t('card_eta'),        color=TEXT)
+        self.card_latency    = StatCard(stats_col, t('card_latency'),    color=TEXT_DIM)
 
-        for c in [self.card_found, self.card_downloaded, self.card_errors, self.card_skipped]:
+        for c in [self.card_found, self.card_downloaded, self.card_errors, self.card_skipped,
+                  self.card_speed, self.card_eta, self.card_latency]:
             c.pack(fill="x", pady=4)
 
         # Progress label below stats
@@ -295,37 +343,103 @@ class MediaDownloaderApp(ctk.CTk):
     def _set_status(self, msg: str, color: str = TEXT_DIM):
         self.status_lbl.configure(text=msg, text_color=color)
 
-    def _append_log(self, text: str):
+    def _append_log(self, lines: list):
+        """Add timestamped lines to log_box in one insert, dropping the oldest past LOG_MAX_LINES."""
+        if self.errors_only_var.get():
+            lines = [line for line in lines if is_error_line(line[11:])]
+        if not lines:
+            return
+        lines       = lines[-LOG_MAX_LINES:]
+        at_bottom   = self.log_box.yview()[1] >= 0.999
         self.log_box.configure(state="normal")
-        ts = time.strftime('%H:%M:%S')
-        self.log_box.insert("end", f"[{ts}] {text}\n")
+        self.log_box.insert("end", "".join(lines))
+        self._log_lines += len(lines)
+        if self._log_lines > LOG_MAX_LINES:
+            excess = self._log_lines - LOG_MAX_LINES
+            self.log_box.delete("1.0", f"{excess + 1}.0")
+            self._log_lines = LOG_MAX_LINES
         self.log_box.configure(state="disabled")
-        self.log_box.see("end")
+        if at_bottom:
+            self.log_box.see("end")
 
     def _poll_log(self):
-        for msg in self._log_queue:
-            self._append_log(msg)
+        if self._log_queue:
+            ts    = time.strftime('%H:%M:%S')
+            lines = [f"[{ts}] {self._log_queue.popleft()}\n"
+                     for _ in range(len(self._log_queue))]
+            self._log_spool.write("".join(lines))
+            self._append_log(lines)
+        self.after(LOG_POLL_MS, self._poll_log)
+
+    def _clear_log(self):
         self._log_queue.clear()
-        self.after(80, self._poll_log)
+        self._log_spool.seek(0)
+        self._log_spool.truncate()
+        self._log_lines = 0
+        self.log_box.configure(state="normal")
+        self.log_box.delete("1.0", "end")
+        self.log_box.configure(state="disabled")
+
+    def _refilter_log(self):
+        """Rebuild log_box from the spool after the filter changed."""
+        errors_only = self.errors_only_var.get()
+        self._log_spool.flush()
+        self._log_spool.seek(0)
+        tail = deque((line for line in self._log_spool
+                      if not errors_only or is_error_line(line[11:])), maxlen=LOG_MAX_LINES)
+        self._log_spool.seek(0, os.SEEK_END)
+        self._log_lines = 0
+        self.log_box.configure(state="normal")
+        self.log_box.delete("1.0", "end")
+        self.log_box.configure(state="disabled")
+        self._append_log(list(tail))
 
     def _log(self, msg: str):
         self._log_queue.append(msg)
 
-    def _update_progress(self, done: int, total: int):
-        pct = (done / total * 100) if total else 0
+    def _poll_progress(self):
+        self._render_progress()
+        self.after(PROGRESS_FRAME_MS, self._poll_progress)
+
+    def _poll_metrics(self):
+        if self._is_downloading:
+            self._render_metrics()
+        self.after(METRICS_FRAME_MS, self._poll_metrics)
+
+    def _render_metrics(self):
+        snap  = self._core.metrics.snapshot()
+        ttfb  = snap["ttfb"].values()
+        count = sum(h["count"] for h in ttfb)
+        avg   = sum(h["avg_ms"] * h["count"] for h in ttfb if h["count"]) / count if count else None
+        self.card_speed.set(f"{format_bytes(snap['current_bps'])}/s")
+        self.card_eta.set(format_eta(snap["eta_seconds"]))
+        self.card_latency.set(f"{avg:.0f} ms" if avg is not None else "–")
+
+    def _render_progress(self):
+        """Draw the newest ProgressBus state, if anything changed since the last frame."""
+        state = self._progress.take()
+        if state is None:
+            return
+        pct = (state.done / state.total * 100) if state.total else 0
         self.progress_var.set(pct / 100)
-        self.progress_lbl.configure(text=t('progress_label', done=done, total=total))
-
-        # Update stat cards
-        if "Saved" in t('file_saved', filename='') or done > 0:
-            self.card_downloaded.set(done)
+        self.progress_lbl.configure(text=t('progress_label', done=state.done, total=state.total))
+        self.card_downloaded.set(state.downloaded)
+        self.card_skipped.set(state.skipped)
+        self.card_errors.set(state.failed)
+        # "Stopping…" stays up until the job actually ends
+        if state.status and self._is_downloading and not self._core.stop_requested:
+            self._set_status(state.status, ACCENT)
 
     def _reset_stats(self):
         for card in [self.card_found, self.card_downloaded,
                      self.card_errors, self.card_skipped]:
             card.set(0)
+        for card in [self.card_speed, self.card_eta, self.card_latency]:
+            card.set("–")
         self.progress_var.set(0)
         self.progress_lbl.configure(text=t('progress_label_init'))
+        self._progress.reset()
+        self._progress.take()
 
     # ── Actions ───────────────────────────────────────────────────────────────
 
@@ -361,8 +475,12 @@ class MediaDownloaderApp(ctk.CTk):
             initialfile=t('save_log_filename', timestamp=ts),
         )
         if path:
+            # the whole run, not just the lines still shown in log_box
+            self._log_spool.flush()
+            self._log_spool.seek(0)
             with open(path, "w", encoding="utf-8") as f:
-                f.write(self.log_box.get("1.0", "end"))
+                shutil.copyfileobj(self._log_spool, f)
+            self._log_spool.seek(0, os.SEEK_END)
             messagebox.showinfo(t('mb_info_title'), t('mb_info_log_saved', path=path))
 
     def _validate_url(self) -> str | None:
@@ -417,17 +535,17 @@ class MediaDownloaderApp(ctk.CTk):
                 return
 
         self._reset_stats()
-        self.log_box.configure(state="normal")
-        self.log_box.delete("1.0", "end")
-        self.log_box.configure(state="disabled")
+        self._clear_log()
 
         self._is_downloading = True
         self.start_btn.configure(state="disabled")
         self.stop_btn.configure(state="normal")
         self._set_status(t('status_fetching'), ACCENT)
 
+        run = self._core.watch if self.watch_var.get() else self._core.download
+
         def _run():
-            self._core.download(
+            run(
                 url            = url,
                 base_folder    = folder,
                 media_type     = self.media_type_var.get(),
@@ -435,8 +553,9 @@ class MediaDownloaderApp(ctk.CTk):
                 max_workers    = self.threads_var.get(),
                 sequential     = self.sequential_var.get(),
                 log_cb         = self._log,
-                progress_cb    = lambda d, tot: self.after(0, self._update_progress, d, tot),
-                status_cb      = lambda msg: self.after(0, self._set_status, msg, ACCENT),
+                progress_cb    = self._progress.progress,
+                status_cb      = self._progress.status,
+                file_cb        = self._progress.file,
                 done_cb        = lambda: self.after(0, self._on_done),
             )
 
@@ -448,6 +567,8 @@ class MediaDownloaderApp(ctk.CTk):
         self._log(t('log_stop_requested'))
 
     def _on_done(self):
+        self._render_progress()   # final counts before the final status
+        self._render_metrics()
         self._is_downloading = False
         self.start_btn.configure(state="normal")
         self.stop_btn.configure(state="disabled")
@@ -0,0 +1,142 @@
+"""
+mediachdl_manifest.py — per-folder download manifest for Media Downloader
+"""
+
+import os
+import json
+import threading
+from typing import Any, Callable, Dict, Optional
+
+MANIFEST_FILENAME = ".mediachdl_manifest.json"
+
+STATUS_DONE    = "done"
+STATUS_PARTIAL = "partial"
+STATUS_FAILED  = "failed"
+STATUS_CORRUPT = "corrupt"   # every attempt failed its md5 check
+
+# Never treated as downloaded media when listing a folder
+_SERVICE_SUFFIXES = (".part", ".alloc", ".alloc.len", ".tmp")
+
+
+class FolderManifest:
+    """
+    What a download folder holds, read with one directory listing instead
+    of an os.path.exists() probe per file.
+    Keeps name -> {size, md5, status} for files written by the downloader
+    and hands out unique target names under a lock, so parallel workers
+    never pick the same _copy name. "verified" marks files whose md5 was
+    checked against the site's while they streamed in.
+    """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.path   = os.path.join(folder, MANIFEST_FILENAME)
+        self._lock  = threading.Lock()
+
+        self.entries: Dict[str, dict] = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        # final files currently on disk, with the size of those we recorded
+        self._on_disk = set()
+        self._sizes: Dict[str, int] = {}
+        with os.scandir(folder) as it:
+            for entry in it:
+                name = entry.name
+                if name == MANIFEST_FILENAME or name.endswith(_SERVICE_SUFFIXES):
+                    continue
+                if entry.is_file():
+                    self._on_disk.add(name)
+                    if name in self.entries:
+                        self._sizes[name] = entry.stat().st_size
+
+        # entries whose file was deleted behind our back are stale
+        for name in list(self.entries):
+            if self.entries[name].get("status") == STATUS_DONE and name not in self._on_disk:
+                del self.entries[name]
+
+        self._claimed: set = set()            # names handed out during this run
+        self._next_copy: Dict[str, int] = {}  # base name -> next _copyN counter
+
+    def claim(self, filename: str, skip_existing: bool, md5: Optional[str] = None):
+        """
+        Reserve a target name for filename. Returns (name, exists); exists is
+        True when skip_existing is on and filename is already downloaded or
+        being downloaded by another worker. A copy on disk that fails
+        _intact() is downloaded again under its own name. An interrupted
+        .part keeps its name so it can be resumed.
+        """
+        with self._lock:
+            taken = filename in self._on_disk or filename in self._claimed
+            if not taken:
+                self._claimed.add(filename)
+                return filename, False
+            if skip_existing:
+                if filename not in self._claimed and not self._intact(filename, md5):
+                    self._claimed.add(filename)
+                    return filename, False
+                return filename, True
+
+            base, ext = os.path.splitext(filename)
+            counter   = self._next_copy.get(base, 0)
+            while True:
+                name = f"{base}_copy{counter or ''}{ext}"
+                counter += 1
+                if name not in self._on_disk and name not in self._claimed:
+                    break
+            self._next_copy[base] = counter
+            self._claimed.add(name)
+            return name, False
+
+    def _intact(self, filename: str, md5: Optional[str]) -> bool:
+        """
+        Whether the copy of filename on disk can be trusted: not when its
+        size differs from the one recorded when it was written, or its
+        recorded md5 differs from md5 (the site's). Files the manifest has
+        no entry for are trusted as before.
+        """
+        entry = self.entries.get(filename)
+        if not entry or entry.get("status") != STATUS_DONE:
+            return True
+        size = self._sizes.get(filename)
+        if entry.get("size") is not None and size is not None and size != entry["size"]:
+            return False
+        return not (md5 and entry.get("md5") and entry["md5"] != md5)
+
+    def has(self, filename: str) -> bool:
+        with self._lock:
+            return filename in self._on_disk
+
+    def record(self, filename: str, status: str, size: Optional[int] = None,
+               md5: Optional[str] = None, post: Optional[int] = None,
+               verified: bool = False):
+        with self._lock:
+            entry = {"size": size, "md5": md5, "status": status}
+            if post is not None:
+                entry["post"] = post
+            if verified:
+                entry["verified"] = True
+            self.entries[filename] = entry
+            if status == STATUS_DONE:
+                self._on_disk.add(filename)
+                if size is not None:
+                    self._sizes[filename] = size
+
+    def save(self, sort_key: Optional[Callable[[str, dict], Any]] = None):
+        """
+        Write the manifest atomically next to the files it describes.
+        Files finish in completion order; sort_key(name, entry), when given,
+        puts the entries back in a stable order first.
+        """
+        with self._lock:
+            entries = self.entries
+            if sort_key is not None:
+                entries = dict(sorted(entries.items(), key=lambda kv: sort_key(*kv)))
+            data = json.dumps(entries, ensure_ascii=False, indent=1)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, self.path)
@@ -0,0 +1,238 @@
+"""
+mediachdl_metrics.py — transfer metrics (throughput, ETA, latency) for Media Downloader
+"""
+
+import json
+import time
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+from mediachdl_scheduler import host_of
+
+# Time-to-first-byte histogram bucket bounds, seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Instantaneous throughput is averaged over this many seconds
+RATE_WINDOW = 5
+
+
+class Histogram:
+    """Fixed-bucket histogram in the Prometheus sense (upper bounds, +Inf last)."""
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum    = 0.0
+        self.count  = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                break
+        else:
+            i = len(LATENCY_BUCKETS)
+        self.counts[i] += 1
+        self.sum       += value
+        self.count     += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile; None when empty."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, n in zip(LATENCY_BUCKETS, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def as_dict(self) -> dict:
+        return {
+            "count":  self.count,
+            "avg_ms": round(self.sum / self.count * 1000, 1) if self.count else None,
+            "p50_ms": _ms(self.quantile(0.5)),
+            "p95_ms": _ms(self.quantile(0.95)),
+        }
+
+
+def _ms(seconds: Optional[float]):
+    if seconds is None or seconds == float("inf"):
+        return seconds
+    return round(seconds * 1000, 1)
+
+
+class TransferMetrics:
+    """
+    Counters fed by the download paths. Totals (bytes, files, failures,
+    latency) accumulate for the lifetime of the core, as Prometheus
+    expects; throughput and ETA are per job, restarted by start_job().
+    """
+
+    def __init__(self):
+        self._lock     = threading.Lock()
+        self.bytes     = 0
+        self.files     = {"ok": 0, "failed": 0}
+        self.failures: Dict[tuple, int] = {}        # (host, kind) -> count
+        self.latency: Dict[str, Histogram] = {}     # host -> TTFB histogram
+        self.start_job()
+
+    def start_job(self):
+        with self._lock:
+            self._job_started  = time.monotonic()
+            self._job_bytes    = 0
+            self._job_files    = 0     # finished files of this job
+            self._known_bytes  = 0     # size of unfinished queued files that have one
+            self._unknown      = 0     # unfinished queued files of unknown size
+            self._seconds      = deque()   # [second, bytes] for the rate window
+
+    # ── Feeds ─────────────────────────────────────────────────────────────────
+
+    def expect(self, records):
+        """Queue records for the ETA; their size is used when the site gives one."""
+        with self._lock:
+            for record in records:
+                if record.size:
+                    self._known_bytes += record.size
+                else:
+                    self._unknown += 1
+
+    def on_bytes(self, n: int):
+        now = int(time.monotonic())
+        with self._lock:
+            self.bytes      += n
+            self._job_bytes += n
+            if self._seconds and self._seconds[-1][0] == now:
+                self._seconds[-1][1] += n
+            else:
+                self._seconds.append([now, n])
+                while self._seconds[0][0] <= now - RATE_WINDOW:
+                    self._seconds.popleft()
+
+    def on_response(self, url: str, ttfb: float):
+        host = host_of(url)
+        with self._lock:
+            histogram = self.latency.get(host)
+            if histogram is None:
+                histogram = self.latency[host] = Histogram()
+            histogram.observe(ttfb)
+
+    def on_file(self, ok: bool, record=None):
+        """A file finished (downloaded, skipped or given up); record leaves the ETA."""
+        with self._lock:
+            self.files["ok" if ok else "failed"] += 1
+            self._job_files += 1
+            if record is None:
+                return
+            if record.size:
+                self._known_bytes = max(0, self._known_bytes - record.size)
+            else:
+                self._unknown = max(0, self._unknown - 1)
+
+    def on_failure(self, host: str, kind: str):
+        with self._lock:
+            key = (host, kind)
+            self.failures[key] = self.failures.get(key, 0) + 1
+
+    # ── Views ─────────────────────────────────────────────────────────────────
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            now      = time.monotonic()
+            elapsed  = now - self._job_started
+            second   = int(now)
+            window   = [n for s, n in self._seconds if s > second - RATE_WINDOW]
+            # the current second is still filling; average over what has passed
+            span     = min(RATE_WINDOW, max(1.0, elapsed))
+            current  = sum(window) / span
+            average  = self._job_bytes / elapsed if elapsed > 0 else 0.0
+            remaining = self._remaining_bytes()
+            rate     = current or average
+            return {
+                "bytes_total":     self.bytes,
+                "job_bytes":       self._job_bytes,
+                "job_seconds":     round(elapsed, 1),
+                "current_bps":     round(current),
+                "average_bps":     round(average),
+                "remaining_bytes": remaining,
+                "eta_seconds":     (round(remaining / rate) if remaining and rate
+                                    else 0 if remaining == 0 else None),
+                "files":           dict(self.files),
+                "failures":        [{"host": h, "kind": k, "count": n}
+                                    for (h, k), n in sorted(self.failures.items())],
+                "ttfb":            {host: h.as_dict() for host, h in sorted(self.latency.items())},
+            }
+
+    def _remaining_bytes(self) -> Optional[int]:
+        """
+        Size of the files still queued: known sizes, plus unknown ones at
+        the job's mean file size so far. In-flight partial bytes are not
+        subtracted, so this errs on the long side by at most one file per
+        transfer.
+        """
+        if not self._unknown:
+            return self._known_bytes
+        if not self._job_files:
+            return None
+        return self._known_bytes + self._unknown * self._job_bytes // self._job_files
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=1)
+
+    def to_prometheus(self) -> str:
+        """Text exposition format (version 0.0.4)."""
+        snap  = self.snapshot()
+        lines = [
+            "# HELP mediachdl_bytes_total Bytes downloaded.",
+            "# TYPE mediachdl_bytes_total counter",
+            f"mediachdl_bytes_total {snap['bytes_total']}",
+            "# HELP mediachdl_files_total Files finished, by result.",
+            "# TYPE mediachdl_files_total counter",
+        ]
+        lines += [f'mediachdl_files_total{{result="{r}"}} {n}' for r, n in snap["files"].items()]
+        lines += [
+            "# HELP mediachdl_throughput_bytes_per_second Current job throughput.",
+            "# TYPE mediachdl_throughput_bytes_per_second gauge",
+            f"mediachdl_throughput_bytes_per_second {snap['current_bps']}",
+            "# HELP mediachdl_eta_seconds Estimated time left in the current job.",
+            "# TYPE mediachdl_eta_seconds gauge",
+        ]
+        if snap["eta_seconds"] is not None:
+            lines.append(f"mediachdl_eta_seconds {snap['eta_seconds']}")
+        lines += [
+            "# HELP mediachdl_failures_total Failed attempts, by host and failure class.",
+            "# TYPE mediachdl_failures_total counter",
+        ]
+        lines += [f'mediachdl_failures_total{{host="{f["host"]}",kind="{f["kind"]}"}} {f["count"]}'
+                  for f in snap["failures"]]
+        lines += [
+            "# HELP mediachdl_ttfb_seconds Time to first response byte, by host.",
+            "# TYPE mediachdl_ttfb_seconds histogram",
+        ]
+        with self._lock:
+            hosts = sorted((host, list(h.counts), h.sum, h.count)
+                           for host, h in self.latency.items())
+        for host, counts, total, count in hosts:
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS + ("+Inf",), counts):
+                cumulative += n
+                lines.append(f'mediachdl_ttfb_seconds_bucket{{host="{host}",le="{bound}"}} {cumulative}')
+            lines.append(f'mediachdl_ttfb_seconds_sum{{host="{host}"}} {total:.6f}')
+            lines.append(f'mediachdl_ttfb_seconds_count{{host="{host}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def format_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "–"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
@@ -0,0 +1,47 @@
+"""
+mediachdl_order.py — download queue ordering policies for Media Downloader
+"""
+
+from typing import List
+
+# Policies understood by order_items()
+ORDER_POST       = "post"         # as posted in the thread
+ORDER_LARGEST    = "largest"      # biggest files first
+ORDER_SMALLEST   = "smallest"     # smallest files first
+ORDER_INTERLEAVE = "interleave"   # biggest, smallest, next biggest, next smallest, …
+ORDER_NAMES = [ORDER_POST, ORDER_LARGEST, ORDER_SMALLEST, ORDER_INTERLEAVE]
+
+
+def needs_sizes(order: str) -> bool:
+    return order != ORDER_POST
+
+
+def order_items(items: list, order: str) -> List:
+    """
+    WorkItems (given in post order) rearranged per order.
+    With N workers the job lasts at least as long as its biggest file, so
+    a large webm started last stretches the whole job; ORDER_LARGEST
+    starts those first and lets small images fill in around them.
+    ORDER_INTERLEAVE keeps a mix of long and short transfers in flight,
+    so files keep landing while the big ones stream.
+    Files of unknown size follow the sized ones, still in post order.
+    """
+    if order == ORDER_POST:
+        return list(items)
+    if order not in ORDER_NAMES:
+        raise ValueError(f"unknown order {order!r}; expected one of {', '.join(ORDER_NAMES)}")
+
+    sized   = [item for item in items if item.record.size]
+    unsized = [item for item in items if not item.record.size]
+    # sorts are stable: equal sizes stay in post order
+    sized.sort(key=lambda item: item.record.size, reverse=order != ORDER_SMALLEST)
+    if order == ORDER_INTERLEAVE:
+        mixed = []
+        lo, hi = 0, len(sized) - 1
+        while lo <= hi:
+            mixed.append(sized[lo])
+            if lo != hi:
+                mixed.append(sized[hi])
+            lo, hi = lo + 1, hi - 1
+        sized = mixed
+    return sized + unsized
@@ -0,0 +1,145 @@
+"""
+mediachdl_ratelimit.py — adaptive (AIMD) per-host rate limiting for Media Downloader
+"""
+
+import time
+import threading
+from typing import Callable, Dict, Optional
+
+from mediachdl_scheduler import host_of
+
+# Starting point and bounds of every host's limits
+INITIAL_CONCURRENCY = 2
+MAX_CONCURRENCY     = 32
+INITIAL_RATE        = 8.0     # requests / second
+MIN_RATE            = 0.5
+MAX_RATE            = 100.0
+RATE_INCREASE       = 0.25    # added to the rate per successful request
+DECREASE_COOLDOWN   = 1.0     # one back-off per burst of failures, seconds
+
+# Statuses that mean "slow down"
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After in seconds; only the delta-seconds form is understood."""
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+class HostLimiter:
+    """
+    Concurrency window plus token bucket for one host, tuned AIMD-style:
+    every success widens the window by 1/window (about +1 per round of
+    transfers) and adds RATE_INCREASE to the rate; a throttle response or
+    connection reset halves both and pauses the host for Retry-After.
+    """
+
+    def __init__(self, host: str, on_change: Optional[Callable[["HostLimiter"], None]] = None):
+        self.host        = host
+        self.window      = float(INITIAL_CONCURRENCY)
+        self.rate        = INITIAL_RATE
+        self._on_change  = on_change
+        self._lock       = threading.Lock()
+        self._in_flight  = 0
+        self._tokens     = 1.0
+        self._refilled   = time.monotonic()
+        self._paused_to  = 0.0
+        self._last_cut   = 0.0
+
+    @property
+    def concurrency(self) -> int:
+        return int(self.window)
+
+    def _wait(self, now: float) -> float:
+        """Seconds until a slot and a token are free; refills the bucket. Lock held."""
+        if now < self._paused_to:
+            return self._paused_to - now
+        if self._in_flight >= self.concurrency:
+            return 0.05
+        self._tokens = min(max(1.0, self.rate),
+                           self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+        if self._tokens < 1.0:
+            return (1.0 - self._tokens) / self.rate
+        return 0.0
+
+    def ready_in(self) -> float:
+        """Seconds until try_acquire() would succeed; 0 if it would now. Takes nothing."""
+        with self._lock:
+            return self._wait(time.monotonic())
+
+    def try_acquire(self) -> float:
+        """Take a slot and a token. Returns 0 on success, else seconds to wait."""
+        with self._lock:
+            wait = self._wait(time.monotonic())
+            if wait:
+                return wait
+            self._tokens    -= 1.0
+            self._in_flight += 1
+            return 0.0
+
+    def acquire(self, stop_event: threading.Event) -> bool:
+        """Blocking try_acquire(). False if stop was requested while waiting."""
+        while not stop_event.is_set():
+            wait = self.try_acquire()
+            if not wait:
+                return True
+            stop_event.wait(wait)
+        return False
+
+    def release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def on_success(self):
+        with self._lock:
+            before      = self.concurrency
+            self.window = min(MAX_CONCURRENCY, self.window + 1.0 / self.window)
+            self.rate   = min(MAX_RATE, self.rate + RATE_INCREASE)
+            changed     = self.concurrency != before
+        if changed and self._on_change:
+            self._on_change(self)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        with self._lock:
+            now = time.monotonic()
+            if retry_after:
+                self._paused_to = max(self._paused_to, now + retry_after)
+            if now - self._last_cut < DECREASE_COOLDOWN:
+                return
+            self._last_cut = now
+            self.window    = max(1.0, self.window / 2)
+            self.rate      = max(MIN_RATE, self.rate / 2)
+        if self._on_change:
+            self._on_change(self)
+
+
+class RateLimiter:
+    """HostLimiter registry; limits persist for the lifetime of the core."""
+
+    def __init__(self, on_change: Optional[Callable[[HostLimiter], None]] = None):
+        self.on_change = on_change
+        self._lock  = threading.Lock()
+        self._hosts: Dict[str, HostLimiter] = {}
+
+    def for_url(self, url: str) -> HostLimiter:
+        return self.for_host(host_of(url))
+
+    def for_host(self, host: str) -> HostLimiter:
+        with self._lock:
+            limiter = self._hosts.get(host)
+            if limiter is None:
+                limiter = self._hosts[host] = HostLimiter(host, self._changed)
+            return limiter
+
+    def _changed(self, limiter: HostLimiter):
+        if self.on_change:
+            self.on_change(limiter)
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {host: {"concurrency": l.concurrency, "rate": round(l.rate, 2)}
+                    for host, l in self._hosts.items()}
@@ -0,0 +1,54 @@
+"""
+mediachdl_retry.py — retry classification and backoff for Media Downloader
+"""
+
+import random
+from typing import Iterable, Optional
+
+# Failure classes
+FAIL_THROTTLED = "throttled"   # 429 / 503
+FAIL_SERVER    = "server"      # other 5xx
+FAIL_NETWORK   = "network"     # connection errors, resets, timeouts
+FAIL_RANGE     = "range"       # .part no longer matches the remote file
+FAIL_CORRUPT   = "corrupt"     # body does not match the md5 the site publishes
+FAIL_HTTP      = "http"        # other unexpected statuses (404, 403, …)
+FAIL_ERROR     = "error"       # anything else (disk, parsing, …)
+
+DEFAULT_RETRY_ON = frozenset({FAIL_THROTTLED, FAIL_SERVER, FAIL_NETWORK, FAIL_RANGE,
+                              FAIL_CORRUPT, FAIL_ERROR})
+
+
+class Failure:
+    """A retryable outcome of one download attempt."""
+    __slots__ = ("kind", "detail", "retry_after")
+
+    def __init__(self, kind: str, detail: str = "", retry_after: Optional[float] = None):
+        self.kind        = kind
+        self.detail      = detail or kind
+        self.retry_after = retry_after
+
+
+class RetryPolicy:
+    """
+    Which failures are retried, how often, and after how long.
+    Delays grow exponentially from base_delay with full jitter, capped at
+    max_delay, and never undercut a server's Retry-After.
+    """
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 1.0,
+                 max_delay: float = 60.0, retry_on: Iterable[str] = DEFAULT_RETRY_ON):
+        self.max_retries = max_retries
+        self.base_delay  = base_delay
+        self.max_delay   = max_delay
+        self.retry_on    = frozenset(retry_on)
+
+    def should_retry(self, failure: Failure, attempts: int) -> bool:
+        """attempts is the number of attempts made so far, including the failed one."""
+        return failure.kind in self.retry_on and attempts < self.max_retries
+
+    def delay(self, failure: Failure, attempts: int) -> float:
+        cap   = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        delay = random.uniform(0, cap)
+        if failure.retry_after:
+            delay = max(delay, min(failure.retry_after, self.max_delay))
+        return delay
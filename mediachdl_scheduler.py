@@ -0,0 +1,174 @@
+"""
+mediachdl_scheduler.py — shared work queue with per-host limits for Media Downloader
+"""
+
+import time
+import heapq
+import itertools
+import threading
+from collections import deque
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+# In-flight transfers per host unless host_limits says otherwise
+DEFAULT_HOST_LIMIT = 4
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).hostname or ""
+
+
+class WorkItem:
+    """
+    One file to download: a MediaRecord, its target folder and its job.
+    filename/file_path are filled in when the target name is claimed, so
+    retries keep writing to the same file; attempts counts tries so far.
+    """
+    __slots__ = ("job", "record", "folder", "host", "filename", "file_path", "attempts")
+
+    def __init__(self, job: str, record, folder: str):
+        self.job       = job
+        self.record    = record
+        self.folder    = folder
+        self.host      = host_of(record.url)
+        self.filename  = None
+        self.file_path = None
+        self.attempts  = 0
+
+
+class HostScheduler:
+    """
+    Work queue shared by all jobs of a batch.
+    Each job keeps its own FIFO; workers take items round-robin across jobs
+    so a large thread can't starve a small one, and never run more than the
+    host's limit of transfers against one host at a time. Items waiting for
+    a retry sit in a delay heap and rejoin the front of their job's queue
+    when due, so no worker sleeps on a backoff.
+    With limits (a RateLimiter) a host's limit is also capped by its AIMD
+    window, and a host that is paused or out of tokens is passed over:
+    workers take the next item of another host instead of waiting on it.
+    """
+
+    def __init__(self, host_limits: Optional[Dict[str, int]] = None,
+                 default_host_limit: int = DEFAULT_HOST_LIMIT, limits=None):
+        self.host_limits        = dict(host_limits or {})
+        self.default_host_limit = default_host_limit
+        self.limits             = limits
+        self._cond    = threading.Condition()
+        self._jobs: Dict[str, deque] = {}
+        self._order   = deque()              # job ids, rotated on every pick
+        self._active: Dict[str, int] = {}    # host -> transfers in flight
+        self._delayed = []                   # heap of (due, seq, item)
+        self._seq     = itertools.count()
+        self._closed  = False
+        self.total    = 0                    # items ever added, across all jobs
+
+    def limit_for(self, host: str) -> int:
+        limit = self.host_limits.get(host, self.default_host_limit)
+        if self.limits is not None:
+            limit = min(limit, self.limits.for_host(host).concurrency)
+        return limit
+
+    def add_job(self, job: str, items):
+        """
+        Queue a job's items. A job with no items (a thread that could not be
+        read, or has no media of the requested type) is not queued at all:
+        an empty queue would keep next_item() from ever seeing the end.
+        """
+        items = list(items)
+        if not items:
+            return
+        with self._cond:
+            queue = self._jobs.setdefault(job, deque())
+            if not queue and job not in self._order:
+                self._order.append(job)
+            queue.extend(items)
+            self.total += len(items)
+            self._cond.notify_all()
+
+    def defer(self, item: WorkItem, delay: float):
+        """Requeue item once delay seconds have passed."""
+        with self._cond:
+            heapq.heappush(self._delayed, (time.monotonic() + delay, next(self._seq), item))
+            self._cond.notify_all()
+
+    def _promote_due(self) -> Optional[float]:
+        """Move due retries back into their queues. Returns seconds to the next one."""
+        now = time.monotonic()
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, item = heapq.heappop(self._delayed)
+            queue = self._jobs.setdefault(item.job, deque())
+            if item.job not in self._order:
+                self._order.append(item.job)
+            queue.appendleft(item)
+        return self._delayed[0][0] - now if self._delayed else None
+
+    def close(self):
+        """No more jobs will be added; workers exit once the queues drain."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def pending(self) -> int:
+        with self._cond:
+            return sum(len(q) for q in self._jobs.values()) + len(self._delayed)
+
+    def _host_wait(self, host: str, waits: Dict[str, Optional[float]]) -> Optional[float]:
+        """
+        0 if host can take another transfer now, seconds until its limiter
+        is ready again, or None while it is at its limit (release() wakes
+        the workers). Cached in waits for the rest of one pick.
+        """
+        if host not in waits:
+            if self._active.get(host, 0) >= self.limit_for(host):
+                waits[host] = None
+            elif self.limits is not None:
+                waits[host] = self.limits.for_host(host).ready_in()
+            else:
+                waits[host] = 0.0
+        return waits[host]
+
+    def _pick(self):
+        """
+        (item, None) for the next runnable item, else (None, seconds until a
+        paused or rate-limited host is ready again, or None).
+        """
+        waits: Dict[str, Optional[float]] = {}
+        for _ in range(len(self._order)):
+            job   = self._order[0]
+            queue = self._jobs[job]
+            self._order.rotate(-1)
+            for index, item in enumerate(queue):
+                if self._host_wait(item.host, waits) != 0:
+                    continue   # a later item may be for a host that is ready
+                del queue[index]
+                if not queue:
+                    self._order.remove(job)
+                    del self._jobs[job]
+                self._active[item.host] = self._active.get(item.host, 0) + 1
+                return item, None
+        ready = [wait for wait in waits.values() if wait]
+        return None, min(ready) if ready else None
+
+    def next_item(self, stop_event: threading.Event) -> Optional[WorkItem]:
+        """
+        Block until an item can run without exceeding its host limit.
+        Returns None once stop is set, or the queue is closed and empty.
+        """
+        with self._cond:
+            while not stop_event.is_set():
+                next_due    = self._promote_due()
+                item, ready = self._pick()
+                if item is not None:
+                    return item
+                if self._closed and not self._jobs and next_due is None \
+                        and not any(self._active.values()):
+                    return None
+                self._cond.wait(min(w for w in (0.5, next_due, ready) if w is not None))
+            return None
+
+    def release(self, item: WorkItem):
+        """Mark item's transfer as finished, freeing a slot on its host."""
+        with self._cond:
+            self._active[item.host] -= 1
+            self._cond.notify_all()
@@ -0,0 +1,231 @@
+"""
+mediachdl_sites.py — per-site link extraction for Media Downloader
+"""
+
+import re
+import json
+import base64
+import importlib.util
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+from mediachdl_core import MEDIA_EXTS, _link_ext
+
+
+@dataclass(frozen=True)
+class MediaRecord:
+    """
+    One media file of a thread.
+    size is in bytes (exact on 4chan, rounded to KB on 2ch); md5 is lowercase
+    hex. Fields the source does not provide are None.
+    """
+    url: str
+    ext: str
+    filename: Optional[str]  = None   # original upload name
+    size: Optional[int]      = None
+    md5: Optional[str]       = None
+    post: Optional[int]      = None
+    timestamp: Optional[int] = None
+
+
+_BOARD_THREAD_RE = re.compile(r"^https?://[^/]+/(\w+)/(?:res|thread)/(\d+)")
+
+
+def _board_and_thread(url: str):
+    match = _BOARD_THREAD_RE.match(url)
+    return (match.group(1), match.group(2)) if match else (None, None)
+
+
+# ── HTML backends ─────────────────────────────────────────────────────────────
+# Each returns the href of every <a> (optionally only those with css_class)
+# in one pass over the document. Parsers are imported on first use: JSON
+# adapters never need one.
+
+def _installed(module: str) -> bool:
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ImportError:
+        return False
+
+
+def _hrefs_selectolax(text: str, css_class: Optional[str] = None) -> List[str]:
+    from selectolax.lexbor import LexborHTMLParser
+    selector = f"a.{css_class}[href]" if css_class else "a[href]"
+    nodes = LexborHTMLParser(text).css(selector)
+    return [href for href in (node.attributes.get("href") for node in nodes) if href]
+
+
+def _hrefs_lxml(text: str, css_class: Optional[str] = None) -> List[str]:
+    import lxml.html
+    if not text.strip():
+        return []
+    if css_class:
+        xpath = f"//a[contains(concat(' ', normalize-space(@class), ' '), ' {css_class} ')]/@href"
+    else:
+        xpath = "//a/@href"
+    return lxml.html.fromstring(text).xpath(xpath, smart_strings=False)
+
+
+def _hrefs_bs4(text: str, css_class: Optional[str] = None) -> List[str]:
+    # the strainer keeps only <a href> in the tree; the class is checked after
+    # parsing since multi-valued class matching is unreliable in strainers
+    from bs4 import BeautifulSoup, SoupStrainer
+    only = SoupStrainer("a", href=True)
+    soup = BeautifulSoup(text, "lxml" if "lxml" in HTML_BACKENDS else "html.parser",
+                         parse_only=only)
+    if css_class:
+        return [tag["href"] for tag in soup.find_all("a", class_=css_class)]
+    return [tag["href"] for tag in soup.find_all("a")]
+
+
+HTML_BACKENDS = {"bs4": _hrefs_bs4}
+if _installed("lxml"):
+    HTML_BACKENDS["lxml"] = _hrefs_lxml
+if _installed("selectolax.lexbor"):
+    HTML_BACKENDS["selectolax"] = _hrefs_selectolax
+
+# Fastest installed backend first
+HTML_BACKEND = next(b for b in ("selectolax", "lxml", "bs4") if b in HTML_BACKENDS)
+
+
+def extract_hrefs(text: str, css_class: Optional[str] = None,
+                  backend: Optional[str] = None) -> List[str]:
+    """All <a href> values of an HTML document using the given or fastest backend."""
+    return HTML_BACKENDS[backend or HTML_BACKEND](text, css_class)
+
+
+class SiteAdapter:
+    """
+    Base adapter: scrapes media links out of the rendered thread HTML.
+    Subclasses with a JSON API override api_url() and read(), and fall
+    back to parse() when handed an HTML page.
+    """
+    name = "html"
+
+    def api_url(self, url: str) -> str:
+        """URL to fetch for url; the thread page itself unless overridden."""
+        return url
+
+    def read(self, url: str, text: str):
+        """
+        Parse a fetched thread. Returns (records, closed); closed tells
+        whether the site marks the thread closed/archived, which HTML
+        pages can't.
+        """
+        return self.parse(url, text), False
+
+    def parse(self, url: str, text: str) -> List[MediaRecord]:
+        records = {}
+        # every <a href> also covers the anchors nested in .file elements
+        for href in extract_hrefs(text):
+            ext = _link_ext(href)
+            if ext:
+                full_url = urljoin(url, href)
+                records[full_url] = MediaRecord(full_url, ext)
+        return list(records.values())
+
+
+class FourChanHtmlAdapter(SiteAdapter):
+    """4chan page scraping, used when the thread URL has no board/id."""
+    name = "4chan-html"
+
+    def parse(self, url: str, text: str) -> List[MediaRecord]:
+        records = {}
+        for href in extract_hrefs(text, "fileThumb"):
+            ext = _link_ext(href)
+            if ext:
+                full_url = urljoin("https://boards.4chan.org/", href)
+                records[full_url] = MediaRecord(full_url, ext)
+        return list(records.values())
+
+
+class FourChanAdapter(FourChanHtmlAdapter):
+    """4chan read-only API: https://a.4cdn.org/<board>/thread/<id>.json"""
+    name = "4chan"
+
+    def api_url(self, url: str) -> str:
+        board, thread_id = _board_and_thread(url)
+        if not board:
+            return url
+        return f"https://a.4cdn.org/{board}/thread/{thread_id}.json"
+
+    def read(self, url: str, text: str):
+        if not text.lstrip().startswith("{"):
+            return super().read(url, text)
+        posts = json.loads(text).get("posts") or []
+        op    = posts[0] if posts else {}
+        return self._records(url, posts), bool(op.get("archived") or op.get("closed"))
+
+    def _records(self, url: str, posts: list) -> List[MediaRecord]:
+        board, _ = _board_and_thread(url)
+        records  = []
+        for post in posts:
+            if "tim" not in post or post.get("filedeleted"):
+                continue
+            ext = post.get("ext", "").lstrip(".")
+            if ext not in MEDIA_EXTS:
+                continue
+            md5 = post.get("md5")
+            records.append(MediaRecord(
+                url       = f"https://i.4cdn.org/{board}/{post['tim']}.{ext}",
+                ext       = ext,
+                filename  = post.get("filename", "") + f".{ext}",
+                size      = post.get("fsize"),
+                md5       = base64.b64decode(md5).hex() if md5 else None,
+                post      = post.get("no"),
+                timestamp = post.get("time"),
+            ))
+        return records
+
+
+class DvachAdapter(SiteAdapter):
+    """2ch thread JSON: https://2ch.su/<board>/res/<id>.json"""
+    name = "2ch"
+
+    def api_url(self, url: str) -> str:
+        board, thread_id = _board_and_thread(url)
+        if not board:
+            return url
+        return urljoin(url, f"/{board}/res/{thread_id}.json")
+
+    def read(self, url: str, text: str):
+        if not text.lstrip().startswith("{"):
+            return super().read(url, text)
+        data    = json.loads(text)
+        threads = data.get("threads") or []
+        posts   = (threads[0].get("posts") or []) if threads else []
+        op      = posts[0] if posts else {}
+        return self._records(url, threads), bool(data.get("is_closed") or op.get("closed"))
+
+    def _records(self, url: str, threads: list) -> List[MediaRecord]:
+        records = []
+        for thread in threads:
+            for post in thread.get("posts", []):
+                for f in post.get("files") or []:
+                    path = f.get("path", "")
+                    ext  = _link_ext(path)
+                    if not ext:
+                        continue
+                    records.append(MediaRecord(
+                        url       = urljoin(url, path),
+                        ext       = ext,
+                        filename  = f.get("fullname") or f.get("name"),
+                        size      = f["size"] * 1024 if f.get("size") else None,
+                        md5       = (f.get("md5") or "").lower() or None,
+                        post      = post.get("num"),
+                        timestamp = post.get("timestamp"),
+                    ))
+        return records
+
+
+ADAPTERS: Dict[str, SiteAdapter] = {
+    "4chan":    FourChanAdapter(),
+    "2ch":      DvachAdapter(),
+    "arhivach": SiteAdapter(),
+}
+
+
+def get_adapter(source: str) -> SiteAdapter:
+    """Adapter for a get_source_name() result; plain HTML scraping if unknown."""
+    return ADAPTERS.get(source, ADAPTERS["arhivach"])
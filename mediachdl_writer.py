@@ -0,0 +1,187 @@
+"""
+mediachdl_writer.py — disk writer stage for Media Downloader
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Optional
+
+# fsync policies
+FSYNC_NEVER = "never"   # leave flushing to the OS; a power cut can lose the newest files
+FSYNC_FILE  = "file"    # fsync each file, and its folder after the rename
+FSYNC_NAMES = [FSYNC_NEVER, FSYNC_FILE]
+
+# Bytes queued by network threads but not yet written, across all files
+WRITE_BUFFER_BYTES = 32 * 1024 * 1024
+
+# The writer thread exits after this many idle seconds and restarts on demand
+IDLE_EXIT = 5.0
+
+_OPEN, _WRITE, _NOTE, _CLOSE = range(4)
+
+
+def preallocate(f, size: int):
+    """Reserve size bytes for f up front; sparse where the OS can't allocate."""
+    if hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+            return
+        except OSError:
+            pass
+    f.truncate(size)
+
+
+def _fsync_dir(folder: str):
+    """Make a rename in folder durable; a no-op where directories can't be opened."""
+    try:
+        fd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class WriteHandle:
+    """
+    One file being written through a DiskWriter. write() only queues the
+    data; the first disk error is kept and raised by the next write(),
+    close() or commit(), after which further writes are dropped.
+    """
+
+    def __init__(self, writer: "DiskWriter", path: str, mode: str, size: int):
+        self.path    = path
+        self.error: Optional[Exception] = None
+        self._writer = writer
+        self._file   = None
+        self._closed = threading.Event()
+        writer._put(self, _OPEN, (mode, size))
+
+    def write(self, data: bytes, offset: Optional[int] = None):
+        """Queue data at offset, or after the previous write when offset is None."""
+        if self.error is not None:
+            raise self.error
+        self._writer._put(self, _WRITE, (data, offset), len(data))
+
+    def note(self, path: str, text: str):
+        """
+        Replace the small side file path with text once everything queued
+        before it is written, so the note never runs ahead of the data.
+        """
+        if self.error is not None:
+            raise self.error
+        self._writer._put(self, _NOTE, (path, text))
+
+    def close(self, sync: Optional[bool] = None):
+        """
+        Wait until everything queued is written, then close; a no-op after
+        the first call. sync forces or skips the fsync; None follows the
+        writer's policy.
+        """
+        if not self._closed.is_set():
+            if sync is None:
+                sync = self._writer.fsync == FSYNC_FILE
+            self._writer._put(self, _CLOSE, sync)
+            self._closed.wait()
+        if self.error is not None:
+            raise self.error
+
+    def commit(self, final_path: str):
+        """close() and rename the file to final_path, durably under FSYNC_FILE."""
+        self.close()
+        os.replace(self.path, final_path)
+        if self._writer.fsync == FSYNC_FILE:
+            _fsync_dir(os.path.dirname(final_path) or ".")
+
+    # ── Writer thread side ────────────────────────────────────────────────────
+
+    def _apply(self, op: int, arg):
+        if op == _CLOSE:
+            try:
+                if self._file is not None:
+                    if arg and self.error is None:
+                        self._file.flush()
+                        os.fsync(self._file.fileno())
+                    self._file.close()
+            except Exception as e:
+                self.error = self.error or e
+            finally:
+                self._closed.set()
+            return
+        if self.error is not None:
+            return
+        try:
+            if op == _OPEN:
+                mode, size = arg
+                self._file = open(self.path, mode)
+                if size:
+                    preallocate(self._file, size)
+            elif op == _NOTE:
+                path, text = arg
+                self._file.flush()
+                with open(path + ".tmp", "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(path + ".tmp", path)
+            else:
+                data, offset = arg
+                if offset is not None:
+                    self._file.seek(offset)
+                self._file.write(data)
+        except Exception as e:
+            self.error = e
+
+
+class DiskWriter:
+    """
+    The disk stage of the download pipeline: one thread performs every
+    open, write, fsync and close of downloaded files, in the order network
+    threads queue them. A network thread blocks only once buffer_bytes are
+    already waiting, so a slow disk throttles the transfers as a whole
+    instead of stalling each of them on every chunk.
+    """
+
+    def __init__(self, fsync: str = FSYNC_NEVER, buffer_bytes: int = WRITE_BUFFER_BYTES):
+        if fsync not in FSYNC_NAMES:
+            raise ValueError(f"fsync must be one of {', '.join(FSYNC_NAMES)}")
+        self.fsync        = fsync
+        self.buffer_bytes = buffer_bytes
+        self._cond        = threading.Condition()
+        self._ops         = deque()   # (handle, op, arg, size)
+        self._buffered    = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def open(self, path: str, mode: str = "wb", preallocate: int = 0) -> WriteHandle:
+        """Start writing path (mode "wb", "ab" or "r+b"), reserving preallocate bytes."""
+        return WriteHandle(self, path, mode, preallocate)
+
+    def _put(self, handle: WriteHandle, op: int, arg, size: int = 0):
+        with self._cond:
+            while self._buffered and self._buffered + size > self.buffer_bytes:
+                self._cond.wait()
+            self._buffered += size
+            self._ops.append((handle, op, arg, size))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="mediachdl-writer",
+                                                daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._ops:
+                    if not self._cond.wait(IDLE_EXIT) and not self._ops:
+                        self._thread = None
+                        return
+                handle, op, arg, size = self._ops.popleft()
+            try:
+                handle._apply(op, arg)
+            finally:
+                if size:
+                    with self._cond:
+                        self._buffered -= size
+                        self._cond.notify_all()
@@ -0,0 +1,8 @@
+"""
+conftest.py — lets the tests import the top-level mediachdl_* modules
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
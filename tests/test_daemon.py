@@ -0,0 +1,26 @@
+"""
+test_daemon.py — daemon job validation and core sharing
+"""
+
+import pytest
+
+from mediachdl_core import MediaDownloaderCore
+from mediachdl_daemon import _job_options
+
+
+def test_host_limits_must_be_an_object():
+    with pytest.raises(ValueError):
+        _job_options({"host_limits": [1]}, "out")
+    assert _job_options({"host_limits": {"a.example": "2"}}, "out")["host_limits"] == {"a.example": 2}
+
+
+def test_watch_core_shares_limits_but_not_stop():
+    core  = MediaDownloaderCore()
+    watch = MediaDownloaderCore(share_with=core)
+    assert watch._limits is core._limits
+    assert watch._page_cache is core._page_cache
+    assert watch._get_session() is core._get_session()
+    watch.request_stop()
+    assert not core.stop_requested
+    watch.close()
+    core.close()
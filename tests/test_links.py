@@ -0,0 +1,43 @@
+"""
+test_links.py — reading a thread through its site adapter
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from mediachdl_core import MediaDownloaderCore
+
+PAGE = ('<html><body><div class="post"><div class="file">'
+        '<a href="/src/1700000000.jpg">f</a></div></div></body></html>')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    api_body = b'{"threads": [{"posts": ['   # truncated JSON
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body = self.api_body if self.path.endswith(".json") else PAGE.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def thread_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/b/res/1.html"
+    server.shutdown()
+    server.server_close()
+
+
+def test_broken_api_falls_back_to_html(thread_url):
+    logs  = []
+    links = MediaDownloaderCore().get_media_links(thread_url, ["jpg"], logs.append)
+    assert [link.rsplit("/", 1)[1] for link in links] == ["1700000000.jpg"]
+    assert any(line.startswith("Thread API unavailable") for line in logs)
@@ -0,0 +1,23 @@
+"""
+test_page_cache.py — PageCache validators and its size bound
+"""
+
+from mediachdl_core import PageCache
+
+
+def test_conditional_headers():
+    cache = PageCache()
+    cache.put("u", '"e"', "Mon, 01 Jan 2024 00:00:00 GMT", {})
+    assert cache.conditional_headers("u") == {
+        "If-None-Match": '"e"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    assert cache.conditional_headers("other") == {}
+
+
+def test_least_recently_used_is_evicted():
+    cache = PageCache(max_entries=2)
+    cache.put("a", "1", None, {})
+    cache.put("b", "2", None, {})
+    cache.get("a")
+    cache.put("c", "3", None, {})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
@@ -0,0 +1,47 @@
+"""
+test_resume.py — what a killed download leaves behind, and how the next run resumes it
+"""
+
+import os
+
+from mediachdl_core import (ALLOC_SUFFIX, PART_SUFFIX, PREFIX_SUFFIX, _failure_for,
+                            _recover_alloc)
+from mediachdl_retry import FAIL_RANGE
+from mediachdl_writer import DiskWriter
+
+
+def test_note_follows_queued_writes(tmp_path):
+    path   = str(tmp_path / "a.webm")
+    handle = DiskWriter().open(path + ALLOC_SUFFIX, "wb", preallocate=1000)
+    handle.write(b"x" * 300)
+    handle.note(path + PREFIX_SUFFIX, "300")
+    handle.close()
+    with open(path + ALLOC_SUFFIX, "rb") as f:
+        assert f.read(300) == b"x" * 300
+    with open(path + PREFIX_SUFFIX) as f:
+        assert f.read() == "300"
+
+
+def test_recover_alloc_keeps_noted_prefix(tmp_path):
+    path = str(tmp_path / "a.webm")
+    with open(path + ALLOC_SUFFIX, "wb") as f:
+        f.write(b"x" * 300 + b"\0" * 700)
+    with open(path + PREFIX_SUFFIX, "w") as f:
+        f.write("300")
+    _recover_alloc(path)
+    assert sorted(os.listdir(tmp_path)) == ["a.webm" + PART_SUFFIX]
+    assert os.path.getsize(path + PART_SUFFIX) == 300
+
+
+def test_recover_alloc_without_note_is_not_resumed(tmp_path):
+    path = str(tmp_path / "a.webm")
+    with open(path + ALLOC_SUFFIX, "wb") as f:
+        f.write(b"\0" * 1000)
+    _recover_alloc(path)
+    assert sorted(os.listdir(tmp_path)) == ["a.webm" + ALLOC_SUFFIX]
+
+
+def test_range_reply_without_part_keeps_its_status(tmp_path):
+    # a 206/416 to a request without Range: there is no .part to drop
+    failure = _failure_for(416, str(tmp_path / "a.webm") + PART_SUFFIX)
+    assert (failure.kind, failure.detail) == (FAIL_RANGE, "HTTP 416")
@@ -0,0 +1,89 @@
+"""
+test_scheduler.py — HostScheduler queueing and shutdown
+"""
+
+import threading
+from types import SimpleNamespace
+
+from mediachdl_ratelimit import RateLimiter
+from mediachdl_scheduler import HostScheduler, WorkItem
+
+
+def _item(job: str, url: str) -> WorkItem:
+    return WorkItem(job, SimpleNamespace(url=url), "folder")
+
+
+def _drain(scheduler: HostScheduler, timeout: float = 5.0) -> list:
+    """Run one worker over scheduler; fails the test if it doesn't finish in time."""
+    taken, stop = [], threading.Event()
+
+    def _worker():
+        while True:
+            item = scheduler.next_item(stop)
+            if item is None:
+                return
+            taken.append(item)
+            scheduler.release(item)
+
+    worker = threading.Thread(target=_worker, daemon=True)
+    worker.start()
+    worker.join(timeout)
+    stop.set()
+    assert not worker.is_alive(), "next_item() never returned None"
+    return taken
+
+
+def test_empty_job_does_not_block_shutdown():
+    # a batch thread that 404s or has no media of the type adds an empty job
+    scheduler = HostScheduler()
+    scheduler.add_job("empty", [])
+    scheduler.add_job("thread", [_item("thread", "https://a.example/1.jpg")])
+    scheduler.close()
+    assert [i.record.url for i in _drain(scheduler)] == ["https://a.example/1.jpg"]
+
+
+def test_only_empty_jobs():
+    scheduler = HostScheduler()
+    scheduler.add_job("empty", iter(()))
+    scheduler.close()
+    assert scheduler.pending() == 0
+    assert _drain(scheduler) == []
+
+
+def test_round_robin_across_jobs():
+    scheduler = HostScheduler()
+    scheduler.add_job("a", [_item("a", f"https://a.example/{n}.jpg") for n in range(2)])
+    scheduler.add_job("b", [_item("b", f"https://b.example/{n}.jpg") for n in range(2)])
+    scheduler.close()
+    assert [i.job for i in _drain(scheduler)] == ["a", "b", "a", "b"]
+
+
+def test_paused_host_is_passed_over():
+    limits = RateLimiter()
+    limits.for_host("a.example").on_throttle(retry_after=60)
+    scheduler = HostScheduler(limits=limits)
+    scheduler.add_job("thread", [_item("thread", "https://a.example/1.jpg"),
+                                 _item("thread", "https://b.example/2.jpg")])
+    item = scheduler.next_item(threading.Event())
+    assert item.host == "b.example"
+    assert scheduler.pending() == 1
+
+
+def test_limit_capped_by_limiter_window():
+    limits    = RateLimiter()
+    scheduler = HostScheduler(host_limits={"a.example": 10}, limits=limits)
+    assert scheduler.limit_for("a.example") == limits.for_host("a.example").concurrency
+
+
+def test_jobs_added_while_workers_wait():
+    # download_batch starts the workers before every thread has been read
+    scheduler = HostScheduler()
+    taken, stop = [], threading.Event()
+    worker = threading.Thread(target=lambda: taken.append(scheduler.next_item(stop)),
+                              daemon=True)
+    worker.start()
+    scheduler.add_job("late", [_item("late", "https://a.example/1.jpg")])
+    worker.join(5)
+    stop.set()
+    assert [i.job for i in taken] == ["late"]
+    assert scheduler.total == 1